@@ -0,0 +1,110 @@
+import os, sys, time
+from threading import Thread, Event
+from typing import Callable, Iterable, Optional
+import numpy as np
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.frame_envelope import FrameEnvelope
+from RabsProject.freeze_watchdog import mark_frozen
+
+
+ANALYSIS_IDLE_SLEEP = float(os.getenv("ANALYSIS_IDLE_SLEEP", "0.01"))  # seconds to wait when no camera had a new frame
+
+
+class AnalysedFrame:
+    """Result of analysing one frame: the frame and its structured detections, plus the annotated image
+    once a viewer or a snapshot has asked for it"""
+    __slots__ = ("frame", "envelope", "detections", "detected", "frozen", "rendered")
+
+    def __init__(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, detections=None, detected=False):
+        # Zero-copy views into a shared ring slot may be recycled before anyone draws them. Arrays a
+        # source recycles itself (FFmpegSource's pool) are already copied by CameraStream on publish
+        self.frame = frame if frame.base is None else frame.copy()
+        self.envelope = envelope
+        self.detections = detections
+        self.detected = detected
+        self.frozen = envelope is not None and envelope.frozen
+        self.rendered = None
+
+
+def render_analysed(processor, state: Optional[AnalysedFrame]) -> Optional[np.ndarray]:
+    """Annotated image for an analysed frame, drawn by processor.render() at most once however many viewers ask"""
+    if state is None:
+        return None
+    if state.rendered is None:
+        state.rendered = mark_frozen(state.frame) if state.frozen else processor.render(state.frame.copy(), state)
+    return state.rendered
+
+
+def wait_for_frames(streams: Iterable, timeout: float) -> bool:
+    """Block until any of `streams` has a frame its reader hasn't taken yet, for at most `timeout` seconds.
+    There is no event shared across cameras, so each stream gets an equal share of the timeout in turn;
+    a single camera wakes the moment its frame is published"""
+    streams = [stream for stream in streams if not stream.stopped]
+    if not streams:
+        time.sleep(timeout)
+        return False
+    deadline = time.monotonic() + timeout
+    share = timeout / len(streams)
+    for stream in streams:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if stream.wait_for_frame(min(share, remaining)):
+            return True
+    return False
+
+
+class AnalysisLoop:
+    """Background thread that keeps a camera system's detection and alerting running whether or not
+    anyone is watching; MJPEG viewers only pick up and draw the latest analysed frames.
+
+    `step` runs one pass over the system's cameras and returns True if it analysed anything. When it
+    didn't, the loop blocks until one of `streams()` has a new frame (or `idle_sleep` passes) instead
+    of sleeping blind.
+    """
+    try:
+        def __init__(self, name: str, step: Callable[[], bool], idle_sleep: float = ANALYSIS_IDLE_SLEEP,
+                     streams: Optional[Callable[[], Iterable]] = None):
+            self.name = name
+            self.step = step
+            self.idle_sleep = idle_sleep
+            self.streams = streams
+            self._stop = Event()
+            self._thread = None
+
+        def start(self) -> 'AnalysisLoop':
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = Thread(target=self._run, name=f"analysis-{self.name}", daemon=True)
+                self._thread.start()
+                logging.info(f"Analysis loop {self.name}: started")
+            return self
+
+        @property
+        def running(self) -> bool:
+            return self._thread is not None and self._thread.is_alive()
+
+        def _run(self) -> None:
+            while not self._stop.is_set():
+                try:
+                    busy = self.step()
+                except Exception as e:
+                    logging.error(f"Analysis loop {self.name}: {str(e)}")
+                    busy = False
+                if not busy:
+                    if self.streams is None:
+                        self._stop.wait(self.idle_sleep)
+                    else:
+                        wait_for_frames(self.streams(), self.idle_sleep)
+
+        def stop(self, timeout: float = 5.0) -> None:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join(timeout=timeout)
+                if self._thread.is_alive():
+                    logging.warning(f"Analysis loop {self.name}: did not stop within {timeout}s")
+            logging.info(f"Analysis loop {self.name}: stopped")
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
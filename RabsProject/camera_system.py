@@ -15,15 +15,29 @@ from math import ceil, sqrt
 import threading
 from collections import deque
 from typing import Optional, Any
-from ultralytics import YOLO
 logging.getLogger('ultralytics').setLevel(logging.WARNING)
-from vidgear.gears import CamGear
 from RabsProject.logger import logging
 from RabsProject.exception import RabsException
 from RabsProject.mongodb import MongoDBHandlerSaving  
 from RabsProject.mon import MongoDBHandlerSaving  
 from RabsProject.send_email import EmailSender
 from RabsProject.utils import save_snapshot, send_data_to_dashboard
+from RabsProject.shared_frames import SharedFrameRing, SharedRingStream, CaptureProcess
+from RabsProject.stream_registry import StreamRegistry, normalize_rtsp_url
+from RabsProject.stream_supervisor import reconnect_supervisor
+from RabsProject.frame_sources import open_frame_source, is_simulated_source, ANALYSIS_FPS
+from RabsProject.frame_envelope import FrameEnvelope, latency_tracker
+from RabsProject.freeze_watchdog import FreezeWatchdog
+from RabsProject.model_pool import model_pool
+from RabsProject.inference_scheduler import InferenceScheduler
+from RabsProject.preprocess import PreprocessCache
+from RabsProject.detections import Detections
+from RabsProject.zone_mask import ZoneMask
+from RabsProject.analysis_loop import AnalysisLoop, AnalysedFrame, render_analysed
+from RabsProject.overlay_cache import OverlayCache, opaque, box_label
+from RabsProject.grid_compositor import GridCompositor
+from RabsProject.motion_gate import MotionGate
+from RabsProject.rate_controller import analysis_rates
 
 frame_queues = {}
 MAX_QUEUE_SIZE = 30  
@@ -34,6 +48,9 @@ fourcc = cv2.VideoWriter_fourcc(*'mp4v')
 motion_frame_buffer = deque(maxlen=moton_buffer_fps * motion_buffer_duration)  
 recording_after_detection = False
 ResurveTime = float(os.getenv("RESURVE_TIME", "10"))
+TRUCK_CROP_INFERENCE = os.getenv("TRUCK_CROP_INFERENCE", "0") == "1"  # track on the loading bay's bounding box only
+TRUCK_CROP_MARGIN = float(os.getenv("TRUCK_CROP_MARGIN", "0.2"))        # extra border, as a fraction of the bay's size
+CAPTURE_MODE = os.getenv("CAPTURE_MODE", "latest")  # "latest" (single overwrite slot), "queue" or "shm" (capture process)
 
 
 
@@ -44,31 +61,75 @@ email = EmailSender(cc_email='namdeopatil.1995@gmail.com')
 class CameraStream:
     """Handles video streaming from RTSP cameras with improved error handling and frame management"""
     try:
-        def __init__(self, rtsp_url: str, camera_id: int, buffer_size: int = 30):
+        def __init__(self, rtsp_url: str, camera_id: int, buffer_size: int = 30, capture_mode: str = CAPTURE_MODE,
+                     frame_ring: Optional[SharedFrameRing] = None, target_fps: float = ANALYSIS_FPS):
             self.rtsp_url = rtsp_url
             self.camera_id = camera_id
+            self.target_fps = target_fps
             self.buffer_size = buffer_size
+            self.capture_mode = capture_mode
+            self.frame_ring = frame_ring
             self.frame_queue = queue.Queue(maxsize=buffer_size)
             self.stopped = False
             self.lock = Lock()
+
+            # "latest" mode: one (seq, FrameEnvelope) slot that the capture thread replaces wholesale.
+            # Readers take a reference to the tuple, so neither side ever waits on a lock.
+            self._latest = (0, None)
+            self._queue_seq = 0
+            self._last_read_seq = 0
+            self._frame_event = threading.Event()
+            self._reconnected = threading.Event()
+            self.watchdog = FreezeWatchdog(camera_id, enabled=not is_simulated_source(rtsp_url))
+            self._freeze_reconnect = False
             self._initialize_stream()
+            reconnect_supervisor.register(self)
             
+        def _open_capture(self):
+            """Open the camera and return (frame source, fps)"""
+            cap = open_frame_source(self.rtsp_url, self.camera_id, target_fps=self.target_fps)
+            return cap, cap.fps
+
         def _initialize_stream(self) -> None:
-            """Initialize or reinitialize the camera stream"""
+            """Initialize the camera stream"""
             try:
-                self.cap = CamGear(source=self.rtsp_url, logging=True).start()
-                self.fps = self.cap.stream.get(cv2.CAP_PROP_FPS)
-                if not self.fps or self.fps <= 0:
-                    self.fps = 30
-                    logging.warning(f"Camera {self.camera_id}: Invalid FPS detected, defaulting to {self.fps}")
+                self.cap, self.fps = self._open_capture()
                 logging.info(f"Camera {self.camera_id}: Initialized with FPS: {self.fps}")
             except RabsException as e:
                 logging.error(f"Camera {self.camera_id}: Failed to initialize stream: {str(e)}")
                 raise
 
+        def reconnect(self) -> bool:
+            """Open a fresh capture and swap it in; runs on a reconnect supervisor worker, never the capture thread"""
+            if self.stopped:
+                return True
+            cap, fps = self._open_capture()
+            try:
+                cap.resume_from(self.cap)
+            except Exception:
+                cap.stop()
+                raise
+            with self.lock:
+                old_cap, self.cap, self.fps = self.cap, cap, fps
+            old_cap.stop()
+            if self.stopped:
+                cap.stop()
+            self._reconnected.set()
+            return True
+
+        def _handle_stall(self, reason: str = "Stream failure") -> None:
+            """Report a dead stream to the supervisor and park this thread until it has been reconnected,
+            so reconnect() never tears down the source while this thread is reading from it"""
+            logging.warning(f"Camera {self.camera_id}: {reason}, handing over to reconnect supervisor")
+            reconnect_supervisor.report_stalled(self)
+            while not self.stopped and not self._reconnected.wait(timeout=0.5):
+                pass
+            self._reconnected.clear()
+
         def start(self) -> 'CameraStream':
             """Start the frame capture thread"""
-            self.capture_thread = Thread(target=self._update, daemon=True)
+            target = self._update if self.capture_mode == "queue" else self._update_latest
+            self.capture_thread = Thread(target=target, daemon=True)
             self.capture_thread.start()
             return self
 
@@ -84,41 +145,164 @@ class CameraStream:
                             except queue.Empty:
                                 pass
                         
-                        frame = self.cap.read()
+                        frame = self._own(self.cap.read())
                         if frame is not None:
-                            self.frame_queue.put(frame)
+                            self._queue_seq += 1
+                            envelope = FrameEnvelope(self.camera_id, self._queue_seq, frame)
+                            envelope.frozen = self._check_frozen(frame)
+                            self.frame_queue.put(envelope)
                             consecutive_failures = 0
                         else:
                             consecutive_failures += 1
-                            if consecutive_failures > 30:
-                                logging.warning(f"Camera {self.camera_id}: Stream failure, attempting restart")
-                                self._restart_stream()
-                                consecutive_failures = 0
+
+                    if self._freeze_reconnect:
+                        self._freeze_reconnect = False
+                        self._handle_stall("Frozen stream")
+                        continue
+                    if frame is not None and not envelope.frozen:
+                        reconnect_supervisor.report_frame(self)
+                    elif consecutive_failures > 30:
+                        self._handle_stall()
+                        consecutive_failures = 0
+                        continue
                                 
                     time.sleep(1 / self.fps)
                     
-                except RabsException as e:
+                except Exception as e:
+                    # Any error, not just ours: a dying capture thread would stop the camera without a trace
+                    if self.stopped:
+                        break  # stop() released the source under a blocked read
                     logging.error(f"Camera {self.camera_id}: Frame capture error: {str(e)}")
                     time.sleep(1)
 
-        def _restart_stream(self) -> None:
-            """Restart the camera stream"""
-            with self.lock:
-                self.cap.stop()
-                time.sleep(2)
-                self._initialize_stream()
+        def _update_latest(self) -> None:
+            """Continuously overwrite the latest-frame slot; the source's read() already paces to the camera"""
+            consecutive_failures = 0
+            while not self.stopped:
+                try:
+                    frame = self.cap.read()
+                    if frame is None:
+                        consecutive_failures += 1
+                        if consecutive_failures > 30:
+                            self._handle_stall()
+                            consecutive_failures = 0
+                        else:
+                            time.sleep(1 / self.fps)
+                        continue
+
+                    consecutive_failures = 0
+                    self._publish(self._own(frame))
+                    if self._freeze_reconnect:
+                        self._freeze_reconnect = False
+                        self._handle_stall("Frozen stream")
+
+                except Exception as e:
+                    # Any error, not just ours: a dying capture thread would stop the camera without a trace
+                    if self.stopped:
+                        break  # stop() released the source under a blocked read
+                    logging.error(f"Camera {self.camera_id}: Frame capture error: {str(e)}")
+                    time.sleep(1)
+
+        def _own(self, frame: Optional[np.ndarray]) -> Optional[np.ndarray]:
+            """Frame safe to hand to readers: a source's recycled buffer would be overwritten under them"""
+            if frame is not None and self.cap.recycles_frames:
+                return frame.copy()
+            return frame
+
+        def _publish(self, frame: np.ndarray) -> None:
+            """Store a new frame in the latest slot and wake anyone blocked in wait_for_newer()"""
+            seq = self._latest[0] + 1
+            envelope = FrameEnvelope(self.camera_id, seq, frame)
+            envelope.frozen = self._check_frozen(frame)
+            self._latest = (seq, envelope)
+            if self.frame_ring is not None:
+                self.frame_ring.write(frame, wall_time_ns=int(envelope.wall_time * 1e9))
+            event, self._frame_event = self._frame_event, threading.Event()
+            event.set()
+            if not envelope.frozen:
+                reconnect_supervisor.report_frame(self)
+
+        def _check_frozen(self, frame: np.ndarray) -> bool:
+            """Run the freeze watchdog; a frozen stream still delivers frames, so it has to ask for the reconnect
+            itself. The capture loop does that through _handle_stall once the frame is published"""
+            frozen = self.watchdog.observe(frame)
+            if frozen and self.watchdog.needs_reconnect():
+                self._freeze_reconnect = True
+            return frozen
 
         def read(self) -> tuple[bool, Optional[np.ndarray]]:
             """Read the most recent frame"""
+            ret, envelope = self.read_envelope()
+            return ret, envelope.frame if ret else None
+
+        def read_envelope(self) -> tuple[bool, Optional[FrameEnvelope]]:
+            """Read the most recent frame with its capture metadata"""
+            if self.capture_mode != "queue":
+                seq, envelope = self._latest
+                if envelope is None or seq == self._last_read_seq:
+                    return False, None
+                self._last_read_seq = seq
+                return True, envelope
+
             try:
-                frame = self.frame_queue.get_nowait()
-                return True, frame
+                return True, self.frame_queue.get_nowait()
             except queue.Empty:
                 return False, None
 
+        def read_latest(self) -> tuple[int, Optional[np.ndarray]]:
+            """Return the newest (seq, frame) pair without consuming it (seq 0 means no frame yet)"""
+            seq, envelope = self._latest
+            return seq, envelope.frame if envelope is not None else None
+
+        def read_latest_envelope(self) -> tuple[int, Optional[FrameEnvelope]]:
+            return self._latest
+
+        def wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> tuple[int, Optional[np.ndarray]]:
+            """Block until a frame newer than `seq` arrives; returns (seq, None) on timeout or stop"""
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.stopped:
+                # Grab the event before checking the slot so a publish in between still wakes us
+                event = self._frame_event
+                latest_seq, envelope = self._latest
+                if latest_seq > seq:
+                    return latest_seq, envelope.frame
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                event.wait(remaining)
+
+            return self._latest[0], None
+
+        def wait_for_frame(self, timeout: Optional[float] = None, after: Optional[int] = None) -> bool:
+            """Block until read_envelope() has a frame newer than `after` (default: the last one this reader
+            took); False on timeout or stop"""
+            if self.capture_mode != "queue":
+                seq = self._last_read_seq if after is None else after
+                return self.wait_for_newer(seq, timeout)[1] is not None
+
+            # Queue mode has no publish event; poll the queue instead
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.stopped and self.frame_queue.empty():
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.002)
+            return not self.stopped
+
+        def decode_stats(self) -> dict:
+            """Frames seen vs. decoded at the capture backend and the resulting skip ratio"""
+            return self.cap.decode_stats()
+
+        def freeze_stats(self) -> dict:
+            """Whether the stream is frozen right now and how long it has been frozen in total"""
+            return self.watchdog.stats()
+
         def stop(self) -> None:
             """Stop the camera stream"""
             self.stopped = True
+            self._frame_event.set()
+            self._reconnected.set()
+            reconnect_supervisor.unregister(self)
             with self.lock:
                 self.cap.stop()
             if hasattr(self, 'capture_thread'):
@@ -128,6 +312,57 @@ class CameraStream:
         raise RabsException(e, sys) from e
 
 
+def open_camera_stream(rtsp_url: str, camera_id, capture_mode: str = CAPTURE_MODE):
+    """Create the frame source for a camera; "shm" decodes in a separate process and reads through shared memory"""
+    if capture_mode == "shm":
+        return SharedRingStream(camera_id, capture=CaptureProcess(rtsp_url, camera_id))
+    return CameraStream(rtsp_url, camera_id, capture_mode=capture_mode)
+
+
+stream_registry = StreamRegistry(open_camera_stream)
+
+
+def acquire_camera_stream(rtsp_url: str, camera_id):
+    """Subscribe to the shared decoder for a camera so each URL is decoded once across categories"""
+    if CAPTURE_MODE == "queue":
+        # Queue mode hands each frame to exactly one reader, so it cannot be shared
+        return open_camera_stream(rtsp_url, camera_id)
+    return stream_registry.acquire(rtsp_url, camera_id)
+
+
+def _model_ready(processor) -> bool:
+    """Whether every model behind a processor (each category's, for a multi-model one) is loaded and warm"""
+    processors = getattr(processor, "processors", None)
+    if processors is not None:
+        return all(_model_ready(category_processor) for category_processor in processors.values())
+    model = getattr(processor, "model", None)
+    # Handles without a ready flag have nothing to warm up
+    return model is not None and getattr(model, "ready", True)
+
+
+def camera_readiness(camera_processors: dict) -> dict:
+    """Per-camera readiness: the model once its pool entry or inference workers report it loaded and warm,
+    the stream once it has delivered a first frame"""
+    readiness = {}
+    for camera_id, processor in camera_processors.items():
+        stream = getattr(processor, "stream", None)
+        stream_ready = stream is not None and hasattr(stream, "read_latest") and stream.read_latest()[0] > 0
+        model_ready = _model_ready(processor)
+        readiness[str(camera_id)] = {"model_ready": model_ready, "stream_ready": stream_ready,
+                                     "ready": model_ready and stream_ready}
+    return readiness
+
+
+def system_processors(system) -> dict:
+    """Camera id -> processor of a running system: a multi-camera system's processors, or the one camera
+    of a single-camera system (none if it found no camera)"""
+    camera_processors = getattr(system, "camera_processors", None)
+    if camera_processors is not None:
+        return camera_processors
+    processor = getattr(system, "processor", None)
+    return {} if processor is None else {processor.camera_id: processor}
+
+
 ####################################################################################################################
                             ## Fire  Detection ##
 ####################################################################################################################
@@ -138,20 +373,25 @@ class MultiCameraSystemFire:
     try:
         """Manages multiple camera streams and their processing"""
 
-        def __init__(self, email: str, model_path:str, category:str):
+        def __init__(self, email: str, model_path:str, category:str, camera_data: Optional[list] = None):
             self.email = email
             self.model_path = model_path
             self.category = category
+            self.camera_data = camera_data  # overrides MongoDB, e.g. synthetic_camera_data() for load tests
             self.camera_processors = {}
             self.is_running = False
             self.mongo_handler = MongoDBHandlerSaving()
-            self.last_frames = {}
+            self.scheduler = InferenceScheduler()
             self._initialize_cameras()
+            # Detection and alerts run whether or not anyone watches; viewers only draw the latest results
+            self.analysis = AnalysisLoop(f"{self.category} {self.email}", self._analyse_pending,
+                                         streams=self._streams).start()
+            self.is_running = True
 
 
         def _initialize_cameras(self) -> None:
             """Fetch camera details from MongoDB and initialize processors"""
-            camera_data = self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, self.category)
+            camera_data = self.camera_data or self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, self.category)
 
             if not camera_data:
                 logging.error(f"No camera data found for email: {self.email}")
@@ -162,55 +402,64 @@ class MultiCameraSystemFire:
                     camera_id = camera["camera_id"]
                     rtsp_link = camera["rtsp_link"]
 
-                    processor = CameraProcessorFire(camera_id=camera_id, rtsp_url=rtsp_link, model_path=self.model_path, category=self.category)
+                    processor = CameraProcessorFire(camera_id=camera_id, rtsp_url=rtsp_link, model_path=self.model_path, category=self.category,
+                                                  motion_roi=camera.get("motion_roi"))
                     processor.stream.start()
                     self.camera_processors[camera_id] = processor
-                    self.last_frames[camera_id] = None
                     logging.info(f"Camera {camera_id}: Initialized successfully from MongoDB")
                 except RabsException as e:
                     logging.error(f"Camera {camera_id}: Initialization failed: {str(e)}")
 
+        def _streams(self):
+            """Streams the analysis loop waits on when no camera had a new frame"""
+            return (processor.stream for processor in self.camera_processors.values())
+
+        def _analyse_pending(self) -> bool:
+            """One pass of the analysis loop: batched inference for every camera with a new frame, no drawing"""
+            pending = self.scheduler.collect(self.camera_processors)
+            for envelope in pending.values():
+                latency_tracker.frame_consumed(envelope, self.category)
+            results = self.scheduler.run(self.camera_processors, pending)
+            for camera_id, envelope in pending.items():
+                self.camera_processors[camera_id].analyse(envelope.frame, envelope=envelope, result=results.get(camera_id))
+            return bool(pending)
+
         def get_video_frames(self):
             """Generator function to yield video frames as bytes for HTTP streaming"""
             logging.info("Streaming multi-camera video frames")
 
-            grid_cols = ceil(sqrt(len(self.camera_processors)))
-            grid_rows = ceil(len(self.camera_processors) / grid_cols)
-            blank_frame = np.zeros((240, 320, 3), dtype=np.uint8)
+            # Canvas and tiles are allocated per layout, not per tick
+            compositor = GridCompositor((320, 240))
+            shown = {}
 
-            while True:
-                frames = []
-                for camera_id, processor in self.camera_processors.items():
-                    if processor.stream.stopped:
-                        continue
-                    
-                    ret, frame = processor.stream.read()
-                    if ret:
-                        processed_frame, _ = processor.process_frame(frame)
-                        self.last_frames[camera_id] = processed_frame
-                    else:
-                        processed_frame = self.last_frames.get(camera_id, blank_frame)
-
-                    frame_resized = cv2.resize(processed_frame, (320, 240))
-                    frames.append(frame_resized)
-
-                if frames:
-                    while len(frames) < grid_rows * grid_cols:
-                        frames.append(blank_frame)
-
-                    rows = [np.hstack(frames[i * grid_cols:(i + 1) * grid_cols]) for i in range(grid_rows)]
-                    grid_display = np.vstack(rows)
+            while self.is_running:
+                displayed = []
+                active = [(camera_id, processor) for camera_id, processor in self.camera_processors.items()
+                          if not processor.stream.stopped]
+                if active:
+                    grid_display = compositor.layout(camera_id for camera_id, _ in active)
+                    for camera_id, processor in active:
+                        # Overlays are drawn here, once per analysed frame, and only while someone is watching
+                        state = processor.latest
+                        processed_frame = render_analysed(processor, state)
+                        if processed_frame is not None and shown.get(camera_id) is not state:
+                            shown[camera_id] = state
+                            if state.envelope is not None:
+                                displayed.append(state.envelope)
+                        compositor.place(camera_id, processed_frame)
 
                     _, buffer = cv2.imencode(".jpg", grid_display)
                     yield (b"--frame\r\n"
                         b"Content-Type: image/jpeg\r\n\r\n" +
                         buffer.tobytes() + b"\r\n")
+                    latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
         def stop(self) -> None:
             """Stop the camera system"""
             self.is_running = False
+            self.analysis.stop()
             for processor in self.camera_processors.values():
                 processor.stream.stop()
             cv2.destroyAllWindows()
@@ -273,10 +522,13 @@ class SingleCameraSystemFire:
             blank_frame = np.zeros((480, 640, 3), dtype=np.uint8)
 
             while self.is_running:
+                displayed = []
                 if self.processor and not self.processor.stream.stopped:
-                    ret, frame = self.processor.stream.read()
+                    ret, envelope = self.processor.stream.read_envelope()
                     if ret:
-                        processed_frame, _ = self.processor.process_frame(frame)
+                        latency_tracker.frame_consumed(envelope, self.category)
+                        processed_frame, _ = self.processor.process_frame(envelope.frame, envelope=envelope)
+                        displayed.append(envelope)
                         self.last_frame = processed_frame
                     else:
                         logging.warning(f"Single Camera {self.camera_id}: Failed to read frame, using last frame")
@@ -290,6 +542,7 @@ class SingleCameraSystemFire:
                 yield (b"--frame\r\n"
                     b"Content-Type: image/jpeg\r\n\r\n" +
                     buffer.tobytes() + b"\r\n")
+                latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
@@ -306,76 +559,116 @@ class SingleCameraSystemFire:
 
 
 class CameraProcessorFire:
-    def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str, confidence=0.3):
+    def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str, confidence=0.3, motion_roi=None,
+                 stream=None, gated: bool = True):
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
         self.category   = category
         self.confidence = confidence
-        self.stream = CameraStream(rtsp_url, camera_id)
+        # A multi-model pipeline hands in its own subscription and does the gating for every category
+        self.stream = stream if stream is not None else acquire_camera_stream(rtsp_url, camera_id)
         self.window_name = f'Camera {self.camera_id}'
         self.last_motion_time = None
         self.motion_frame_buffer = deque(maxlen=100)  # Buffer for motion frames
         self.recording_after_detection = False
         self.recording_end_time = None
         self.fourcc = cv2.VideoWriter_fourcc(*'XVID')  # Properly define fourcc
+        self.motion_gate = MotionGate(camera_id, roi=motion_roi) if gated else None
+        self.rate = analysis_rates.register(camera_id, category) if gated else None
+        self.latest = None          # AnalysedFrame of the last frame that went through the model
+        self._infer_key = None
+        self._infer_decision = True
         self._initialize_model(model_path)
 
     def _initialize_model(self, model_path: str) -> None:
         try:
-            self.model = YOLO(model_path)
+            self.model = model_pool.acquire(model_path, task="obb")
             logging.info(f"Camera {self.camera_id}: Model initialized successfully")
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Model initialization failed: {str(e)}")
             raise
 
-    def process_frame(self, frame: np.ndarray) -> tuple[np.ndarray, bool]:
+    def should_infer(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> bool:
+        """Motion gate, then the adaptive rate budget, so still frames don't spend budget ticks; cached on the envelope
+        seq so the scheduler and analyse() agree"""
+        if self.rate is None:
+            return True     # ungated category of a multi-model pipeline, which already decided
+        key = envelope.seq if envelope is not None else None
+        if key is None or key != self._infer_key:
+            self._infer_decision = self.motion_gate.should_infer(frame) and self.rate.due()
+            self._infer_key = key
+        return self._infer_decision
+
+    def inference_args(self) -> dict:
+        """predict() arguments; cameras with equal arguments on the same model are batched together"""
+        return {"task": "obb", "conf": self.confidence, "verbose": False}
+
+    def analyse(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, result=None) -> bool:
+        """Detection and alerting for one frame; nothing is drawn unless an alert needs a snapshot.
+        `result` is a batched Results or Detections for this frame, if inference already ran"""
         try:
-            self.motion_frame_buffer.append(frame.copy())
-
-            # Run inference with task='obb'
-            results = self.model.predict(frame, task='obb', conf=self.confidence, verbose=False)
-            result = results[0]
-            annotated_frame = result.orig_img.copy()
-
-            detected = False
-
-            # Process Oriented Bounding Boxes
-            if result.obb is not None:
-                for i in range(len(result.obb.xywhr)):
-                    x, y, w, h, angle = result.obb.xywhr[i].cpu().numpy()
-                    cls = int(result.obb.cls[i].item())
-                    conf = float(result.obb.conf[i].item())
-
-                    # Assuming class 0 = fire
-                    if cls == 0:
-                        detected = True
-
-                        # Create and draw the rotated bounding box
-                        rect = ((x, y), (w, h), angle)
-                        box = cv2.boxPoints(rect).astype(int)
-                        cv2.polylines(annotated_frame, [box], isClosed=True, color=(0, 0, 255), thickness=2)
-
-                        # Optional: draw class and confidence
-                        label = f"{self.model.names[cls]} {conf:.2f}"
-                        cv2.putText(annotated_frame, label, (box[0][0], box[0][1] - 10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+            if envelope is not None and envelope.frozen:
+                self.latest = AnalysedFrame(frame, envelope)
+                return False
+            if result is None and self.latest is not None and not self.latest.frozen and not self.should_infer(frame, envelope):
+                # Static scene: skip the model, but show the live frame with the last detections drawn on it
+                self.latest = AnalysedFrame(frame, envelope, self.latest.detections, self.latest.detected)
+                return self.latest.detected
+
+            buffered = frame.copy()
+            self.motion_frame_buffer.append(buffered)
+
+            # Run inference with task='obb' unless the batch scheduler already did
+            if result is None:
+                result = self.model.predict(frame, **self.inference_args())[0]
+                if envelope is not None:
+                    envelope.stamp("inferred")
+
+            # Process Oriented Bounding Boxes: one device-to-host copy per frame, then array operations
+            detections = result if isinstance(result, Detections) else Detections.from_result(result)
+            # Assuming class 0 = fire
+            fire = detections.select(detections.cls == 0)
+            detected = len(fire) > 0
+            self.latest = AnalysedFrame(buffered, envelope, fire, detected)
 
             if detected:
                 self.current_time = datetime.now()
                 if self.last_motion_time is None or (self.current_time - self.last_motion_time).total_seconds() > ResurveTime:
                     self.last_motion_time = self.current_time
+                    latency_tracker.frame_alerted(envelope)
 
-                    snapshot_path = save_snapshot(frame=annotated_frame, camera_id=self.camera_id, category=self.category)
+                    snapshot_path = save_snapshot(frame=render_analysed(self, self.latest), camera_id=self.camera_id, category=self.category)
                     thread = threading.Thread(
                         target=send_data_to_dashboard,
                         args=(snapshot_path, self.current_time, self.camera_id, self.category))
                     thread.start()
 
-            return annotated_frame, detected
+            if self.rate is not None:
+                self.rate.record(detected=detected, motion=self.motion_gate.motion)
+            return detected
 
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Frame processing error: {str(e)}")
-            return frame, False
+            return False
+
+    def render(self, canvas: np.ndarray, state: AnalysedFrame) -> np.ndarray:
+        """Draw an analysed frame's boxes onto `canvas`; only called for frames a viewer or snapshot needs"""
+        boxes = state.detections.corners().round().astype(np.int32)
+        if len(boxes):
+            cv2.polylines(canvas, list(boxes), isClosed=True, color=(0, 0, 255), thickness=2)
+
+            # Optional: draw class and confidence
+            for box, cls, conf in zip(boxes, state.detections.cls, state.detections.conf):
+                label = box_label(self.model.names[cls], conf)
+                cv2.putText(canvas, label, (int(box[0][0]), int(box[0][1]) - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+        return canvas
+
+    def process_frame(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, result=None) -> tuple[np.ndarray, bool]:
+        """analyse() and render() in one call, for viewers that show every frame they analyse"""
+        detected = self.analyse(frame, envelope=envelope, result=result)
+        annotated_frame = render_analysed(self, self.latest)
+        return (frame if annotated_frame is None else annotated_frame), detected
 
 
 ####################################################################################################################
@@ -389,20 +682,25 @@ class MultiCameraSystemSmoke:
     try:
         """Manages multiple camera streams and their processing"""
 
-        def __init__(self, email: str, model_path:str, category:str):
+        def __init__(self, email: str, model_path:str, category:str, camera_data: Optional[list] = None):
             self.email = email
             self.model_path = model_path
             self.category = category
+            self.camera_data = camera_data  # overrides MongoDB, e.g. synthetic_camera_data() for load tests
             self.camera_processors = {}
             self.is_running = False
             self.mongo_handler = MongoDBHandlerSaving()
-            self.last_frames = {}
+            self.scheduler = InferenceScheduler()
             self._initialize_cameras()
+            # Detection and alerts run whether or not anyone watches; viewers only draw the latest results
+            self.analysis = AnalysisLoop(f"{self.category} {self.email}", self._analyse_pending,
+                                         streams=self._streams).start()
+            self.is_running = True
 
 
         def _initialize_cameras(self) -> None:
             """Fetch camera details from MongoDB and initialize processors"""
-            camera_data = self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, self.category)
+            camera_data = self.camera_data or self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, self.category)
 
             if not camera_data:
                 logging.error(f"No camera data found for email: {self.email}")
@@ -413,55 +711,64 @@ class MultiCameraSystemSmoke:
                     camera_id = camera["camera_id"]
                     rtsp_link = camera["rtsp_link"]
 
-                    processor = CameraProcessorSmoke(camera_id=camera_id, rtsp_url=rtsp_link, model_path=self.model_path, category=self.category)
+                    processor = CameraProcessorSmoke(camera_id=camera_id, rtsp_url=rtsp_link, model_path=self.model_path, category=self.category,
+                                                  motion_roi=camera.get("motion_roi"))
                     processor.stream.start()
                     self.camera_processors[camera_id] = processor
-                    self.last_frames[camera_id] = None
                     logging.info(f"Camera {camera_id}: Initialized successfully from MongoDB")
                 except RabsException as e:
                     logging.error(f"Camera {camera_id}: Initialization failed: {str(e)}")
 
+        def _streams(self):
+            """Streams the analysis loop waits on when no camera had a new frame"""
+            return (processor.stream for processor in self.camera_processors.values())
+
+        def _analyse_pending(self) -> bool:
+            """One pass of the analysis loop: batched inference for every camera with a new frame, no drawing"""
+            pending = self.scheduler.collect(self.camera_processors)
+            for envelope in pending.values():
+                latency_tracker.frame_consumed(envelope, self.category)
+            results = self.scheduler.run(self.camera_processors, pending)
+            for camera_id, envelope in pending.items():
+                self.camera_processors[camera_id].analyse(envelope.frame, envelope=envelope, result=results.get(camera_id))
+            return bool(pending)
+
         def get_video_frames(self):
             """Generator function to yield video frames as bytes for HTTP streaming"""
             logging.info("Streaming multi-camera video frames")
 
-            grid_cols = ceil(sqrt(len(self.camera_processors)))
-            grid_rows = ceil(len(self.camera_processors) / grid_cols)
-            blank_frame = np.zeros((240, 320, 3), dtype=np.uint8)
-
-            while True:
-                frames = []
-                for camera_id, processor in self.camera_processors.items():
-                    if processor.stream.stopped:
-                        continue
-                    
-                    ret, frame = processor.stream.read()
-                    if ret:
-                        processed_frame, _ = processor.process_frame(frame)
-                        self.last_frames[camera_id] = processed_frame
-                    else:
-                        processed_frame = self.last_frames.get(camera_id, blank_frame)
-
-                    frame_resized = cv2.resize(processed_frame, (320, 240))
-                    frames.append(frame_resized)
+            # Canvas and tiles are allocated per layout, not per tick
+            compositor = GridCompositor((320, 240))
+            shown = {}
 
-                if frames:
-                    while len(frames) < grid_rows * grid_cols:
-                        frames.append(blank_frame)
-
-                    rows = [np.hstack(frames[i * grid_cols:(i + 1) * grid_cols]) for i in range(grid_rows)]
-                    grid_display = np.vstack(rows)
+            while self.is_running:
+                displayed = []
+                active = [(camera_id, processor) for camera_id, processor in self.camera_processors.items()
+                          if not processor.stream.stopped]
+                if active:
+                    grid_display = compositor.layout(camera_id for camera_id, _ in active)
+                    for camera_id, processor in active:
+                        # Overlays are drawn here, once per analysed frame, and only while someone is watching
+                        state = processor.latest
+                        processed_frame = render_analysed(processor, state)
+                        if processed_frame is not None and shown.get(camera_id) is not state:
+                            shown[camera_id] = state
+                            if state.envelope is not None:
+                                displayed.append(state.envelope)
+                        compositor.place(camera_id, processed_frame)
 
                     _, buffer = cv2.imencode(".jpg", grid_display)
                     yield (b"--frame\r\n"
                         b"Content-Type: image/jpeg\r\n\r\n" +
                         buffer.tobytes() + b"\r\n")
+                    latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
         def stop(self) -> None:
             """Stop the camera system"""
             self.is_running = False
+            self.analysis.stop()
             for processor in self.camera_processors.values():
                 processor.stream.stop()
             cv2.destroyAllWindows()
@@ -524,10 +831,13 @@ class SingleCameraSystemSmoke:
             blank_frame = np.zeros((480, 640, 3), dtype=np.uint8)
 
             while self.is_running:
+                displayed = []
                 if self.processor and not self.processor.stream.stopped:
-                    ret, frame = self.processor.stream.read()
+                    ret, envelope = self.processor.stream.read_envelope()
                     if ret:
-                        processed_frame, _ = self.processor.process_frame(frame)
+                        latency_tracker.frame_consumed(envelope, self.category)
+                        processed_frame, _ = self.processor.process_frame(envelope.frame, envelope=envelope)
+                        displayed.append(envelope)
                         self.last_frame = processed_frame
                     else:
                         logging.warning(f"Single Camera {self.camera_id}: Failed to read frame, using last frame")
@@ -541,6 +851,7 @@ class SingleCameraSystemSmoke:
                 yield (b"--frame\r\n"
                     b"Content-Type: image/jpeg\r\n\r\n" +
                     buffer.tobytes() + b"\r\n")
+                latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
@@ -557,76 +868,116 @@ class SingleCameraSystemSmoke:
 
 
 class CameraProcessorSmoke:
-    def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str, confidence=0.3):
+    def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str, confidence=0.3, motion_roi=None,
+                 stream=None, gated: bool = True):
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
         self.category   = category
         self.confidence = confidence
-        self.stream = CameraStream(rtsp_url, camera_id)
+        # A multi-model pipeline hands in its own subscription and does the gating for every category
+        self.stream = stream if stream is not None else acquire_camera_stream(rtsp_url, camera_id)
         self.window_name = f'Camera {self.camera_id}'
         self.last_motion_time = None
         self.motion_frame_buffer = deque(maxlen=100)  # Buffer for motion frames
         self.recording_after_detection = False
         self.recording_end_time = None
         self.fourcc = cv2.VideoWriter_fourcc(*'XVID')  # Properly define fourcc
+        self.motion_gate = MotionGate(camera_id, roi=motion_roi) if gated else None
+        self.rate = analysis_rates.register(camera_id, category) if gated else None
+        self.latest = None          # AnalysedFrame of the last frame that went through the model
+        self._infer_key = None
+        self._infer_decision = True
         self._initialize_model(model_path)
 
     def _initialize_model(self, model_path: str) -> None:
         try:
-            self.model = YOLO(model_path)
+            self.model = model_pool.acquire(model_path, task="obb")
             logging.info(f"Camera {self.camera_id}: Model initialized successfully")
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Model initialization failed: {str(e)}")
             raise
 
-    def process_frame(self, frame: np.ndarray) -> tuple[np.ndarray, bool]:
+    def should_infer(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> bool:
+        """Motion gate, then the adaptive rate budget, so still frames don't spend budget ticks; cached on the envelope
+        seq so the scheduler and analyse() agree"""
+        if self.rate is None:
+            return True     # ungated category of a multi-model pipeline, which already decided
+        key = envelope.seq if envelope is not None else None
+        if key is None or key != self._infer_key:
+            self._infer_decision = self.motion_gate.should_infer(frame) and self.rate.due()
+            self._infer_key = key
+        return self._infer_decision
+
+    def inference_args(self) -> dict:
+        """predict() arguments; cameras with equal arguments on the same model are batched together"""
+        return {"task": "obb", "conf": self.confidence, "verbose": False}
+
+    def analyse(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, result=None) -> bool:
+        """Detection and alerting for one frame; nothing is drawn unless an alert needs a snapshot.
+        `result` is a batched Results or Detections for this frame, if inference already ran"""
         try:
-            self.motion_frame_buffer.append(frame.copy())
-
-            # Run inference with task='obb'
-            results = self.model.predict(frame, task='obb', conf=self.confidence, verbose=False)
-            result = results[0]
-            annotated_frame = result.orig_img.copy()
-
-            detected = False
-
-            # Process Oriented Bounding Boxes
-            if result.obb is not None:
-                for i in range(len(result.obb.xywhr)):
-                    x, y, w, h, angle = result.obb.xywhr[i].cpu().numpy()
-                    cls = int(result.obb.cls[i].item())
-                    conf = float(result.obb.conf[i].item())
-
-                    # Assuming class 0 = smoke
-                    if cls == 0:
-                        detected = True
-
-                        # Create and draw the rotated bounding box
-                        rect = ((x, y), (w, h), angle)
-                        box = cv2.boxPoints(rect).astype(int)
-                        cv2.polylines(annotated_frame, [box], isClosed=True, color=(0, 0, 255), thickness=2)
-
-                        # Optional: draw class and confidence
-                        label = f"{self.model.names[cls]} {conf:.2f}"
-                        cv2.putText(annotated_frame, label, (box[0][0], box[0][1] - 10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+            if envelope is not None and envelope.frozen:
+                self.latest = AnalysedFrame(frame, envelope)
+                return False
+            if result is None and self.latest is not None and not self.latest.frozen and not self.should_infer(frame, envelope):
+                # Static scene: skip the model, but show the live frame with the last detections drawn on it
+                self.latest = AnalysedFrame(frame, envelope, self.latest.detections, self.latest.detected)
+                return self.latest.detected
+
+            buffered = frame.copy()
+            self.motion_frame_buffer.append(buffered)
+
+            # Run inference with task='obb' unless the batch scheduler already did
+            if result is None:
+                result = self.model.predict(frame, **self.inference_args())[0]
+                if envelope is not None:
+                    envelope.stamp("inferred")
+
+            # Process Oriented Bounding Boxes: one device-to-host copy per frame, then array operations
+            detections = result if isinstance(result, Detections) else Detections.from_result(result)
+            # Assuming class 0 = smoke
+            smoke = detections.select(detections.cls == 0)
+            detected = len(smoke) > 0
+            self.latest = AnalysedFrame(buffered, envelope, smoke, detected)
 
             if detected:
                 self.current_time = datetime.now()
                 if self.last_motion_time is None or (self.current_time - self.last_motion_time).total_seconds() > ResurveTime:
                     self.last_motion_time = self.current_time
+                    latency_tracker.frame_alerted(envelope)
 
-                    snapshot_path = save_snapshot(frame=annotated_frame, camera_id=self.camera_id, category=self.category)
+                    snapshot_path = save_snapshot(frame=render_analysed(self, self.latest), camera_id=self.camera_id, category=self.category)
                     thread = threading.Thread(
                         target=send_data_to_dashboard,
                         args=(snapshot_path, self.current_time, self.camera_id, self.category)   )
                     thread.start()
 
-            return annotated_frame, detected
+            if self.rate is not None:
+                self.rate.record(detected=detected, motion=self.motion_gate.motion)
+            return detected
 
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Frame processing error: {str(e)}")
-            return frame, False
+            return False
+
+    def render(self, canvas: np.ndarray, state: AnalysedFrame) -> np.ndarray:
+        """Draw an analysed frame's boxes onto `canvas`; only called for frames a viewer or snapshot needs"""
+        boxes = state.detections.corners().round().astype(np.int32)
+        if len(boxes):
+            cv2.polylines(canvas, list(boxes), isClosed=True, color=(0, 0, 255), thickness=2)
+
+            # Optional: draw class and confidence
+            for box, cls, conf in zip(boxes, state.detections.cls, state.detections.conf):
+                label = box_label(self.model.names[cls], conf)
+                cv2.putText(canvas, label, (int(box[0][0]), int(box[0][1]) - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+        return canvas
+
+    def process_frame(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, result=None) -> tuple[np.ndarray, bool]:
+        """analyse() and render() in one call, for viewers that show every frame they analyse"""
+        detected = self.analyse(frame, envelope=envelope, result=result)
+        annotated_frame = render_analysed(self, self.latest)
+        return (frame if annotated_frame is None else annotated_frame), detected
 
 
 ####################################################################################################################
@@ -639,20 +990,25 @@ class MultiCameraSystemSafty:
     try:
         """Manages multiple camera streams and their processing"""
 
-        def __init__(self, email: str, model_path:str, category:str):
+        def __init__(self, email: str, model_path:str, category:str, camera_data: Optional[list] = None):
             self.email = email
             self.model_path = model_path
             self.category = category
+            self.camera_data = camera_data  # overrides MongoDB, e.g. synthetic_camera_data() for load tests
             self.camera_processors = {}
             self.is_running = False
             self.mongo_handler = MongoDBHandlerSaving()
-            self.last_frames = {}
+            self.scheduler = InferenceScheduler()
             self._initialize_cameras()
+            # Detection and alerts run whether or not anyone watches; viewers only draw the latest results
+            self.analysis = AnalysisLoop(f"{self.category} {self.email}", self._analyse_pending,
+                                         streams=self._streams).start()
+            self.is_running = True
 
 
         def _initialize_cameras(self) -> None:
             """Fetch camera details from MongoDB and initialize processors"""
-            camera_data = self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, self.category)
+            camera_data = self.camera_data or self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, self.category)
 
             if not camera_data:
                 logging.error(f"No camera data found for email: {self.email}")
@@ -663,55 +1019,64 @@ class MultiCameraSystemSafty:
                     camera_id = camera["camera_id"]
                     rtsp_link = camera["rtsp_link"]
 
-                    processor = CameraProcessorSafty(camera_id=camera_id, rtsp_url=rtsp_link, model_path=self.model_path, category=self.category)
+                    processor = CameraProcessorSafty(camera_id=camera_id, rtsp_url=rtsp_link, model_path=self.model_path, category=self.category,
+                                                  motion_roi=camera.get("motion_roi"))
                     processor.stream.start()
                     self.camera_processors[camera_id] = processor
-                    self.last_frames[camera_id] = None
                     logging.info(f"Camera {camera_id}: Initialized successfully from MongoDB")
                 except RabsException as e:
                     logging.error(f"Camera {camera_id}: Initialization failed: {str(e)}")
 
+        def _streams(self):
+            """Streams the analysis loop waits on when no camera had a new frame"""
+            return (processor.stream for processor in self.camera_processors.values())
+
+        def _analyse_pending(self) -> bool:
+            """One pass of the analysis loop: batched inference for every camera with a new frame, no drawing"""
+            pending = self.scheduler.collect(self.camera_processors)
+            for envelope in pending.values():
+                latency_tracker.frame_consumed(envelope, self.category)
+            results = self.scheduler.run(self.camera_processors, pending)
+            for camera_id, envelope in pending.items():
+                self.camera_processors[camera_id].analyse(envelope.frame, envelope=envelope, result=results.get(camera_id))
+            return bool(pending)
+
         def get_video_frames(self):
             """Generator function to yield video frames as bytes for HTTP streaming"""
             logging.info("Streaming multi-camera video frames")
 
-            grid_cols = ceil(sqrt(len(self.camera_processors)))
-            grid_rows = ceil(len(self.camera_processors) / grid_cols)
-            blank_frame = np.zeros((240, 320, 3), dtype=np.uint8)
+            # Canvas and tiles are allocated per layout, not per tick
+            compositor = GridCompositor((320, 240))
+            shown = {}
 
-            while True:
-                frames = []
-                for camera_id, processor in self.camera_processors.items():
-                    if processor.stream.stopped:
-                        continue
-                    
-                    ret, frame = processor.stream.read()
-                    if ret:
-                        processed_frame, _ = processor.process_frame(frame)
-                        self.last_frames[camera_id] = processed_frame
-                    else:
-                        processed_frame = self.last_frames.get(camera_id, blank_frame)
-
-                    frame_resized = cv2.resize(processed_frame, (320, 240))
-                    frames.append(frame_resized)
-
-                if frames:
-                    while len(frames) < grid_rows * grid_cols:
-                        frames.append(blank_frame)
-
-                    rows = [np.hstack(frames[i * grid_cols:(i + 1) * grid_cols]) for i in range(grid_rows)]
-                    grid_display = np.vstack(rows)
+            while self.is_running:
+                displayed = []
+                active = [(camera_id, processor) for camera_id, processor in self.camera_processors.items()
+                          if not processor.stream.stopped]
+                if active:
+                    grid_display = compositor.layout(camera_id for camera_id, _ in active)
+                    for camera_id, processor in active:
+                        # Overlays are drawn here, once per analysed frame, and only while someone is watching
+                        state = processor.latest
+                        processed_frame = render_analysed(processor, state)
+                        if processed_frame is not None and shown.get(camera_id) is not state:
+                            shown[camera_id] = state
+                            if state.envelope is not None:
+                                displayed.append(state.envelope)
+                        compositor.place(camera_id, processed_frame)
 
                     _, buffer = cv2.imencode(".jpg", grid_display)
                     yield (b"--frame\r\n"
                         b"Content-Type: image/jpeg\r\n\r\n" +
                         buffer.tobytes() + b"\r\n")
+                    latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
         def stop(self) -> None:
             """Stop the camera system"""
             self.is_running = False
+            self.analysis.stop()
             for processor in self.camera_processors.values():
                 processor.stream.stop()
             cv2.destroyAllWindows()
@@ -776,10 +1141,13 @@ class SingleCameraSystemSafty:
             blank_frame = np.zeros((480, 640, 3), dtype=np.uint8)
 
             while self.is_running:
+                displayed = []
                 if self.processor and not self.processor.stream.stopped:
-                    ret, frame = self.processor.stream.read()
+                    ret, envelope = self.processor.stream.read_envelope()
                     if ret:
-                        processed_frame, _ = self.processor.process_frame(frame)
+                        latency_tracker.frame_consumed(envelope, self.category)
+                        processed_frame, _ = self.processor.process_frame(envelope.frame, envelope=envelope)
+                        displayed.append(envelope)
                         self.last_frame = processed_frame
                     else:
                         logging.warning(f"Single Camera {self.camera_id}: Failed to read frame, using last frame")
@@ -793,6 +1161,7 @@ class SingleCameraSystemSafty:
                 yield (b"--frame\r\n"
                     b"Content-Type: image/jpeg\r\n\r\n" +
                     buffer.tobytes() + b"\r\n")
+                latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
@@ -809,60 +1178,104 @@ class SingleCameraSystemSafty:
 
 
 class CameraProcessorSafty:
-    def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str, confidence=0.3):
+    def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str, confidence=0.3, motion_roi=None,
+                 stream=None, gated: bool = True):
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
         self.category  = category
         self.confidence = confidence
-        self.stream = CameraStream(rtsp_url, camera_id)
+        # A multi-model pipeline hands in its own subscription and does the gating for every category
+        self.stream = stream if stream is not None else acquire_camera_stream(rtsp_url, camera_id)
         self.window_name = f'Camera {self.camera_id}'
         self.last_motion_time = None
         self.motion_frame_buffer = deque(maxlen=100)  # Buffer for motion frames
         self.recording_after_detection = False
         self.recording_end_time = None
         self.fourcc = cv2.VideoWriter_fourcc(*'XVID')  # Properly define fourcc
+        self.motion_gate = MotionGate(camera_id, roi=motion_roi) if gated else None
+        self.rate = analysis_rates.register(camera_id, category) if gated else None
+        self.latest = None          # AnalysedFrame of the last frame that went through the model
+        self._infer_key = None
+        self._infer_decision = True
         self._initialize_model(model_path)
 
     def _initialize_model(self, model_path: str) -> None:
         try:
-            self.model = YOLO(model_path)
+            self.model = model_pool.acquire(model_path)
             logging.info(f"Camera {self.camera_id}: Model initialized successfully")
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Model initialization failed: {str(e)}")
             raise
 
-    def process_frame(self, frame: np.ndarray) -> tuple[np.ndarray, bool]:
+    def should_infer(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> bool:
+        """Motion gate, then the adaptive rate budget, so still frames don't spend budget ticks; cached on the envelope
+        seq so the scheduler and analyse() agree"""
+        if self.rate is None:
+            return True     # ungated category of a multi-model pipeline, which already decided
+        key = envelope.seq if envelope is not None else None
+        if key is None or key != self._infer_key:
+            self._infer_decision = self.motion_gate.should_infer(frame) and self.rate.due()
+            self._infer_key = key
+        return self._infer_decision
+
+    def inference_args(self) -> dict:
+        """predict() arguments; cameras with equal arguments on the same model are batched together"""
+        return {"conf": self.confidence, "verbose": False}
+
+    def analyse(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, result=None) -> bool:
+        """Detection and alerting for one frame; nothing is drawn unless an alert needs a snapshot.
+        `result` is a batched Results or Detections for this frame, if inference already ran"""
         try:
-            self.motion_frame_buffer.append(frame.copy())
+            if envelope is not None and envelope.frozen:
+                self.latest = AnalysedFrame(frame, envelope)
+                return False
+            if result is None and self.latest is not None and not self.latest.frozen and not self.should_infer(frame, envelope):
+                # Static scene: skip the model, but show the live frame with the last detections drawn on it
+                self.latest = AnalysedFrame(frame, envelope, self.latest.detections, self.latest.detected)
+                return self.latest.detected
 
-            results = self.model(frame, conf=self.confidence, verbose=False)
-            annotated_frame = results[0].plot()
+            buffered = frame.copy()
+            self.motion_frame_buffer.append(buffered)
 
-            # Extract detection class labels
-            detections = results[0].boxes
-            detected = False
+            if result is None:
+                result = self.model(frame, **self.inference_args())[0]
+                if envelope is not None:
+                    envelope.stamp("inferred")
 
-            if detections is not None and detections.cls is not None:
-                class_ids = detections.cls.cpu().numpy().astype(int)
-               
-                detected = any(cls_id in [0] for cls_id in class_ids)
+            # Extract detection class labels
+            detections = result if isinstance(result, Detections) else Detections.from_result(result)
+            detected = bool((detections.cls == 0).any())
+            self.latest = AnalysedFrame(buffered, envelope, detections, detected)
 
             if detected:
                 self.current_time = datetime.now()
                 if self.last_motion_time is None or (self.current_time - self.last_motion_time).total_seconds() > ResurveTime:
                     self.last_motion_time = self.current_time
+                    latency_tracker.frame_alerted(envelope)
 
-                    snapshot_path = save_snapshot(frame=annotated_frame, camera_id=self.camera_id, category=self.category)
+                    snapshot_path = save_snapshot(frame=render_analysed(self, self.latest), camera_id=self.camera_id, category=self.category)
                     thread = threading.Thread(
                         target=send_data_to_dashboard,
                         args=(snapshot_path, self.current_time, self.camera_id, self.category) )
                     thread.start()
 
-            return annotated_frame, detected
+            if self.rate is not None:
+                self.rate.record(detected=detected, motion=self.motion_gate.motion)
+            return detected
 
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Frame processing error: {str(e)}")
-            return frame, False
+            return False
+
+    def render(self, canvas: np.ndarray, state: AnalysedFrame) -> np.ndarray:
+        """Ultralytics' plot() of an analysed frame's boxes on `canvas`; only called for frames a viewer or snapshot needs"""
+        return state.detections.to_result(canvas, self.model.names).plot()
+
+    def process_frame(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None, result=None) -> tuple[np.ndarray, bool]:
+        """analyse() and render() in one call, for viewers that show every frame they analyse"""
+        detected = self.analyse(frame, envelope=envelope, result=result)
+        annotated_frame = render_analysed(self, self.latest)
+        return (frame if annotated_frame is None else annotated_frame), detected
 
 
 
@@ -874,20 +1287,25 @@ class CameraProcessorSafty:
 
 class MultiCameraSystemTruck:
     try:
-        def __init__(self, email: str, model_path : str, category : str, confidence=0.3, cooldown_period=60):
+        def __init__(self, email: str, model_path : str, category : str, confidence=0.3, cooldown_period=60,
+                     camera_data: Optional[list] = None):
             self.email = email
             self.model_path = model_path
             self.category = category
+            self.camera_data = camera_data
             self.confidence = confidence
             self.cooldown_period = cooldown_period
             self.camera_processors = {}
             self.is_running = False
             self.mongo_handler = MongoDBHandlerSaving()
-            self.last_frames = {}
             self._initialize_cameras()
+            # Tracking and the loading timers run whether or not anyone watches; viewers only draw the latest results
+            self.analysis = AnalysisLoop(f"{self.category} {self.email}", self._analyse_pending,
+                                         streams=self._streams).start()
+            self.is_running = True
 
         def _initialize_cameras(self) -> None:
-            camera_data = self.mongo_handler.fetch_camera_rtsp_by_email_and_category(email = self.email, category = self.category)
+            camera_data = self.camera_data or self.mongo_handler.fetch_camera_rtsp_by_email_and_category(email = self.email, category = self.category)
 
             if not camera_data:
                 logging.error(f"No camera data found for email: {self.email} and {self.category}")
@@ -920,57 +1338,73 @@ class MultiCameraSystemTruck:
                         polygon_points=polygon_points,  # Pass the parsed polygon points
                         confidence=self.confidence, 
                         cooldown_period=self.cooldown_period,
-                        category=self.category)
+                        category=self.category,
+                        motion_roi=camera.get("motion_roi"))
                         
                     processor.stream.start()
                     self.camera_processors[camera_id] = processor
-                    self.last_frames[camera_id] = None
                     logging.info(f"Camera {camera_id}: Initialized successfully from MongoDB")
                 except RabsException as e:
                     logging.error(f"Camera {camera_id}: Initialization failed: {str(e)}")
 
+        def _streams(self):
+            """Streams the analysis loop waits on when no camera had a new frame"""
+            return (processor.stream for processor in self.camera_processors.values())
+
+        def _analyse_pending(self) -> bool:
+            """One pass of the analysis loop: track every camera that has a new frame, no drawing"""
+            analysed = False
+            for processor in self.camera_processors.values():
+                if processor.stream.stopped:
+                    continue
+                ret, envelope = processor.stream.read_envelope()
+                if not ret:
+                    continue
+                frame = envelope.frame
+                if frame.shape[:2] != (1080, 1920):
+                    # Polygons are stored in 1920x1080 coordinates; sources already scaled to it skip this
+                    frame = cv2.resize(frame, (1920, 1080))
+                latency_tracker.frame_consumed(envelope, self.category)
+                processor.analyse(frame, envelope=envelope)
+                analysed = True
+            return analysed
+
         def get_video_frames(self):
             """Generator function to yield multi-camera video frames as bytes for HTTP streaming."""
             logging.info("Streaming multi-camera video frames")
 
-            grid_cols = ceil(sqrt(len(self.camera_processors)))
-            grid_rows = ceil(len(self.camera_processors) / grid_cols)
-            blank_frame = np.zeros((240, 320, 3), dtype=np.uint8)
+            # Canvas and tiles are allocated per layout, not per tick
+            compositor = GridCompositor((640, 480))
+            shown = {}
 
-            while True:
-                frames = []
-                for camera_id, processor in self.camera_processors.items():
-                    if processor.stream.stopped:
-                        continue
-
-                    ret, frame = processor.stream.read()
-                    frame = cv2.resize(frame, (1920,1080))
-                    if ret:
-                        processed_frame, _, _= processor.process_frame(frame)
-                        self.last_frames[camera_id] = processed_frame
-                    else:
-                        processed_frame = self.last_frames.get(camera_id, blank_frame)
-
-                    frame_resized = cv2.resize(processed_frame, (640, 480))
-                    frames.append(frame_resized)
-
-                if frames:
-                    while len(frames) < grid_rows * grid_cols:
-                        frames.append(blank_frame)
-
-                    rows = [np.hstack(frames[i * grid_cols:(i + 1) * grid_cols]) for i in range(grid_rows)]
-                    grid_display = np.vstack(rows)
+            while self.is_running:
+                displayed = []
+                active = [(camera_id, processor) for camera_id, processor in self.camera_processors.items()
+                          if not processor.stream.stopped]
+                if active:
+                    grid_display = compositor.layout(camera_id for camera_id, _ in active)
+                    for camera_id, processor in active:
+                        # Overlays are drawn here, once per analysed frame, and only while someone is watching
+                        state = processor.latest
+                        processed_frame = render_analysed(processor, state)
+                        if processed_frame is not None and shown.get(camera_id) is not state:
+                            shown[camera_id] = state
+                            if state.envelope is not None:
+                                displayed.append(state.envelope)
+                        compositor.place(camera_id, processed_frame)
 
                     _, buffer = cv2.imencode(".jpg", grid_display)
                     yield (b"--frame\r\n"
                         b"Content-Type: image/jpeg\r\n\r\n" +
                         buffer.tobytes() + b"\r\n")
+                    latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
         def stop(self) -> None:
             """Stop the multi-camera system."""
             self.is_running = False
+            self.analysis.stop()
             for processor in self.camera_processors.values():
                 processor.stream.stop()
             cv2.destroyAllWindows()
@@ -990,11 +1424,11 @@ class MultiCameraSystemTruck:
 class CameraProcessorTruckYOLO:
     try:
         def __init__(self, camera_id: int, rtsp_url: str, model_path: str, category:str,
-                    polygon_points=None, confidence=0.25, cooldown_period=60, truck_class=0):
+                    polygon_points=None, confidence=0.25, cooldown_period=60, truck_class=0, motion_roi=None):
             self.camera_id = camera_id
             self.rtsp_url = rtsp_url
             self.category = category
-            self.stream = CameraStream(rtsp_url, camera_id)
+            self.stream = acquire_camera_stream(rtsp_url, camera_id)
             self.window_name = f'Camera {self.camera_id}'
             
             # Set polygon points from parameter or use default if None
@@ -1004,6 +1438,8 @@ class CameraProcessorTruckYOLO:
             else:
                 self.polygon = np.array([(571, 716), (825, 577), (1259, 616), (1256, 798)], np.int32)
                 logging.info(f"Camera {self.camera_id}: Using default polygon")
+            self.zones = ZoneMask([self.polygon])  # zone 0 is the loading bay
+            self.overlay = OverlayCache(self.draw_static_overlay)
             
             self.confidence = confidence
             self.truck_class = truck_class  # COCO class index for 'truck'
@@ -1019,13 +1455,23 @@ class CameraProcessorTruckYOLO:
             # Logging configuration
             self.log_file = f"tracking_log_camera_{self.camera_id}.csv"
             self.init_logging()
+
+            # Only motion inside the loading zone matters unless the camera has its own ROI
+            self.motion_gate = MotionGate(camera_id, roi=motion_roi if motion_roi is not None else self.polygon.tolist())
+            self._last_boxes = []
+            self._last_in_polygon = False
+            self.latest = None          # AnalysedFrame with boxes_info as its detections
+            self.rate = analysis_rates.register(camera_id, category)
+
+            self.crop_inference = TRUCK_CROP_INFERENCE
+            self.crop_margin = TRUCK_CROP_MARGIN
             
             self._initialize_model(model_path)
 
         def _initialize_model(self, model_path: str) -> None:
             """Initialize YOLO model"""
             try:
-                self.model = YOLO(model_path)
+                self.model = model_pool.acquire(model_path, tracking=True)
                 logging.info(f"Camera {self.camera_id}: Model initialized successfully")
             except RabsException as e:
                 logging.error(f"Camera {self.camera_id}: Model initialization failed: {str(e)}")
@@ -1043,11 +1489,12 @@ class CameraProcessorTruckYOLO:
                 writer = csv.writer(file)
                 writer.writerow([datetime.now().strftime('%Y-%m-%d %H:%M:%S'), round(duration, 2)])
 
-        def is_point_in_polygon(self, point):
-            """Check if a point is inside the polygon."""
-            if self.polygon is None:
-                return False
-            return cv2.pointPolygonTest(self.polygon, point, False) >= 0
+        def crop_region(self, frame_shape) -> tuple[int, int, int, int]:
+            """Polygon bounding rectangle plus margin, clipped to the frame: (x1, y1, x2, y2)"""
+            h, w = frame_shape[:2]
+            x, y, bw, bh = cv2.boundingRect(self.polygon)
+            mx, my = int(bw * self.crop_margin), int(bh * self.crop_margin)
+            return max(0, x - mx), max(0, y - my), min(w, x + bw + mx), min(h, y + bh + my)
 
         def format_time(self, seconds):
             """Format seconds into HH:MM:SS."""
@@ -1057,22 +1504,23 @@ class CameraProcessorTruckYOLO:
             return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
-        def draw_overlay(self, frame, boxes_info):
-            """Draw visualization elements on the frame."""
+        def draw_static_overlay(self, layer):
+            """Loading zone outline; drawn once into the overlay layer, not per frame."""
             if self.polygon is not None:
                 pts = self.polygon.reshape((-1, 1, 2))
-                cv2.polylines(frame, [pts], True, (0, 255, 0), 2)
+                cv2.polylines(layer, [pts], True, opaque((0, 255, 0)), 2)
 
+        def draw_overlay(self, frame, boxes_info):
+            """Draw visualization elements on the frame."""
             if self.timer_active and self.timer_start is not None:
                 elapsed_time = time.time() - self.timer_start
-                timer_text = f"Loading Time: {self.format_time(elapsed_time)}"
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                font_scale = 1.0
-                thickness = 2
-
-                (text_width, text_height), _ = cv2.getTextSize(timer_text, font, font_scale, thickness)
-                cv2.rectangle(frame, (10, 10), (20 + text_width, 40 + text_height), (0, 0, 0), -1)
-                cv2.putText(frame, timer_text, (15, 35), font, font_scale, (255, 255, 255), thickness)
+                # Re-rendered into the overlay layer only when the displayed second changes
+                self.overlay.set_text("timer", f"Loading Time: {self.format_time(elapsed_time)}", (15, 35),
+                                      scale=1.0, box=(5, 25, 5, 5))
+            else:
+                self.overlay.set_text("timer", None, (15, 35))
+            self.overlay.set_clock("timestamp", (10, frame.shape[0] - 10))
+            frame = self.overlay.composite(frame)
 
             for box_info in boxes_info:
                 x1, y1, x2, y2 = box_info['bbox']
@@ -1086,52 +1534,57 @@ class CameraProcessorTruckYOLO:
                 label = f"ID: {track_id}"
                 cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            cv2.putText(frame, timestamp, (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-            
             return frame
 
-        def process_frame(self, frame: np.ndarray) -> tuple[np.ndarray, list, bool]:
-            """Process a frame with object detection and truck tracking."""
+        def analyse(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> tuple[list, bool]:
+            """Truck tracking and the loading timer for one frame, without drawing anything"""
+            if envelope is not None and envelope.frozen:
+                self.latest = AnalysedFrame(frame, envelope)
+                return [], False
+            if not self.motion_gate.should_infer(frame) or not self.rate.due():
+                # Nothing moved in the zone or out of budget: keep the last tracking state, the timer overlay keeps counting
+                self.latest = AnalysedFrame(frame, envelope, self._last_boxes, self._last_in_polygon)
+                return self._last_boxes, self._last_in_polygon
+
             truck_in_polygon = False
             current_time = time.time()
             boxes_info = []
             
-            # Run YOLO tracking
-            results = self.model.track(frame, persist=True, conf=self.confidence, classes=[self.truck_class])
+            # Run YOLO tracking, on the loading bay crop only in crop mode
+            offset_x, offset_y = 0, 0
+            source = frame
+            if self.crop_inference and self.polygon is not None:
+                offset_x, offset_y, crop_x2, crop_y2 = self.crop_region(frame.shape)
+                source = np.ascontiguousarray(frame[offset_y:crop_y2, offset_x:crop_x2])
+            results = self.model.track(source, persist=True, conf=self.confidence, classes=[self.truck_class])
+            if envelope is not None:
+                envelope.stamp("inferred")
             
             if results and len(results) > 0:
-                boxes = results[0].boxes
-                if boxes is not None and len(boxes) > 0:
-                    for box in boxes:
-                        if hasattr(box, 'cls') and box.cls.cpu().numpy()[0] == self.truck_class:
-                            x1, y1, x2, y2 = box.xyxy.cpu().numpy()[0]
-                            center_x = int((x1 + x2) / 2)
-                            center_y = int((y1 + y2) / 2)
-                            center_point = (center_x, center_y)
-
-                            track_id = int(box.id.cpu().numpy()[0]) if hasattr(box, 'id') and box.id is not None else -1
-
-                            if track_id != -1:
-                                is_inside = self.is_point_in_polygon(center_point)
-                                if is_inside:
-                                    truck_in_polygon = True
-
-                                boxes_info.append({
-                                    'bbox': (x1, y1, x2, y2),
-                                    'center': center_point,
-                                    'track_id': track_id,
-                                    'is_inside': is_inside
-                                })
-
-
-            annotated_frame = self.draw_overlay(frame.copy(), boxes_info)
-            
+                detections = Detections.from_result(results[0])
+                # Untracked boxes (no id yet) are ignored, as are other classes
+                if detections.has_ids and len(detections) > 0:
+                    trucks = detections.select(detections.cls == self.truck_class)
+                    xyxy = trucks.data[:, :4] + np.array([offset_x, offset_y, offset_x, offset_y], np.float32)
+                    centers = ((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(np.int32)
+                    inside = self.zones.contains(centers, frame.shape)
+                    truck_in_polygon = bool(inside.any())
+
+                    for bbox, center, track_id, is_inside in zip(xyxy.tolist(), centers.tolist(),
+                                                                  trucks.ids.tolist(), inside.tolist()):
+                        boxes_info.append({
+                            'bbox': tuple(bbox),
+                            'center': tuple(center),
+                            'track_id': track_id,
+                            'is_inside': is_inside
+                        })
+
             # Timer logic based on whether a truck is in the polygon
             if truck_in_polygon:
                 if not self.timer_active:
                     self.timer_active = True
                     self.timer_start = current_time
+                    latency_tracker.frame_alerted(envelope)
                     logging.info(f"Camera {self.camera_id}: Truck entered region. Timer started at {self.timer_start}")
             else:
                 if self.timer_active:
@@ -1141,7 +1594,19 @@ class CameraProcessorTruckYOLO:
                     self.timer_active = False
                     self.timer_start = None
 
-            return annotated_frame, boxes_info, truck_in_polygon
+            self.rate.record(detected=bool(boxes_info), motion=self.motion_gate.motion)
+            self._last_boxes, self._last_in_polygon = boxes_info, truck_in_polygon
+            self.latest = AnalysedFrame(frame, envelope, boxes_info, truck_in_polygon)
+            return boxes_info, truck_in_polygon
+
+        def render(self, canvas: np.ndarray, state: AnalysedFrame) -> np.ndarray:
+            """Zone, timer and tracked boxes for an analysed frame; only called for frames a viewer needs"""
+            return self.draw_overlay(canvas, state.detections)
+
+        def process_frame(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> tuple[np.ndarray, list, bool]:
+            """Process a frame with object detection and truck tracking."""
+            boxes_info, truck_in_polygon = self.analyse(frame, envelope=envelope)
+            return render_analysed(self, self.latest), boxes_info, truck_in_polygon
 
     except Exception as e:
         raise RabsException(e, sys) from e
@@ -1226,10 +1691,13 @@ class SingleCameraSystemTruck:
             blank_frame = np.zeros((480, 640, 3), dtype=np.uint8)
 
             while self.is_running:
+                displayed = []
                 if self.processor and not self.processor.stream.stopped:
-                    ret, frame = self.processor.stream.read()
+                    ret, envelope = self.processor.stream.read_envelope()
                     if ret:
-                        processed_frame, _, _ = self.processor.process_frame(frame)
+                        latency_tracker.frame_consumed(envelope, self.category)
+                        processed_frame, _, _ = self.processor.process_frame(envelope.frame, envelope=envelope)
+                        displayed.append(envelope)
                         self.last_frame = processed_frame
                     else:
                         logging.warning(f"Single Camera {self.camera_id}: Failed to read frame, using last frame")
@@ -1243,6 +1711,7 @@ class SingleCameraSystemTruck:
                 yield (b"--frame\r\n"
                     b"Content-Type: image/jpeg\r\n\r\n" +
                     buffer.tobytes() + b"\r\n")
+                latency_tracker.frames_displayed(displayed)
 
                 time.sleep(0.05)  # Small delay to control FPS
 
@@ -1261,6 +1730,180 @@ class SingleCameraSystemTruck:
 
 
 
+####################################################################################################################
+                            ## Multi-Model (several categories per camera) ##
+####################################################################################################################
+
+
+
+class CameraProcessorMultiModel:
+    """Runs several category models on one camera: the frame is read and letterboxed once per input size,
+    then each category's processor gets its own detections and raises its own events"""
+    PROCESSORS = {"fire": CameraProcessorFire, "smoke": CameraProcessorSmoke, "ppe": CameraProcessorSafty}
+
+    def __init__(self, camera_id, rtsp_url: str, model_paths: dict, confidence=0.3, motion_roi=None):
+        self.camera_id = camera_id
+        self.rtsp_url = rtsp_url
+        self.stream = acquire_camera_stream(rtsp_url, camera_id)
+        # One gate for the camera; the per-category gates would only repeat the same work
+        self.motion_gate = MotionGate(camera_id, roi=motion_roi)
+        self.rate = analysis_rates.register(camera_id, "+".join(model_paths))
+        self.latest = None          # AnalysedFrame with {category: detected}; each category keeps its own detections
+        self.processors = {}
+        for category, model_path in model_paths.items():
+            # Every category reads through this pipeline's subscription and is gated by this pipeline
+            self.processors[category] = self.PROCESSORS[category](
+                camera_id=camera_id, rtsp_url=rtsp_url, model_path=model_path, category=category,
+                confidence=confidence, stream=self.stream, gated=False)
+
+    def analyse(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> dict:
+        """Runs every category on the frame and returns {category: detected}; nothing is drawn"""
+        if envelope is not None and envelope.frozen:
+            self.latest = AnalysedFrame(frame, envelope, detected={category: False for category in self.processors})
+            return self.latest.detected
+        if self.latest is not None and not self.latest.frozen and not (self.motion_gate.should_infer(frame) and self.rate.due()):
+            # Live frame; render() draws each category's last detections on it
+            self.latest = AnalysedFrame(frame, envelope, detected=self.latest.detected)
+            return self.latest.detected
+
+        cache = PreprocessCache(frame)
+        detected = {}
+        for category, processor in self.processors.items():
+            result = None
+            if hasattr(processor.model, "predict_blob"):
+                try:
+                    blob, ratio, pad = cache.get(processor.model.imgsz)
+                    detections = processor.model.predict_blob(blob, **processor.inference_args())[0]
+                    result = detections.unletterboxed(ratio, pad, frame.shape[:2])
+                    if envelope is not None:
+                        envelope.stamp(f"inferred_{category}")
+                except Exception as e:
+                    logging.error(f"Camera {self.camera_id}: Shared-preprocess inference for {category} failed: {str(e)}")
+            detected[category] = processor.analyse(frame, envelope=envelope, result=result)
+        self.rate.record(detected=any(detected.values()), motion=self.motion_gate.motion)
+        self.latest = AnalysedFrame(frame, envelope, detected=detected)
+        return detected
+
+    def render(self, canvas: np.ndarray, state: AnalysedFrame) -> np.ndarray:
+        """Each category draws its latest detections on top of the previous one"""
+        for processor in self.processors.values():
+            if processor.latest is not None and not processor.latest.frozen:
+                canvas = processor.render(canvas, processor.latest)
+        return canvas
+
+    def process_frame(self, frame: np.ndarray, envelope: Optional[FrameEnvelope] = None) -> tuple[np.ndarray, dict]:
+        """Returns the frame annotated by every category and {category: detected}"""
+        detected = self.analyse(frame, envelope=envelope)
+        return render_analysed(self, self.latest), detected
+
+
+class MultiCameraSystemMultiModel:
+    try:
+        """Manages cameras registered under several categories with one decode and one preprocess per frame"""
+
+        def __init__(self, email: str, model_paths: dict, category: str, camera_data: Optional[list] = None):
+            self.email = email
+            self.model_paths = model_paths          # {"fire": "models/fire.pt", "smoke": "models/smoke.pt"}
+            self.category = category
+            self.camera_data = camera_data  # overrides MongoDB; every listed camera runs every category
+            self.camera_processors = {}
+            self.is_running = False
+            self.mongo_handler = MongoDBHandlerSaving()
+            self._initialize_cameras()
+            self.analysis = AnalysisLoop(f"{self.category} {self.email}", self._analyse_pending,
+                                         streams=self._streams).start()
+            self.is_running = True
+
+        def _cameras_by_url(self) -> dict:
+            """{normalized url: (camera_id, rtsp_link, [categories])} so a camera in two categories is opened once"""
+            cameras = {}
+            for category in self.model_paths:
+                camera_data = self.camera_data or self.mongo_handler.fetch_camera_rtsp_by_email_and_category(self.email, category)
+                for camera in camera_data or []:
+                    key = normalize_rtsp_url(camera["rtsp_link"])
+                    cameras.setdefault(key, (camera["camera_id"], camera["rtsp_link"], []))[2].append(category)
+            return cameras
+
+        def _initialize_cameras(self) -> None:
+            """Fetch camera details for every category and build one pipeline per physical camera"""
+            cameras = self._cameras_by_url()
+            if not cameras:
+                logging.error(f"No camera data found for email: {self.email}")
+                return
+
+            for camera_id, rtsp_link, categories in cameras.values():
+                try:
+                    processor = CameraProcessorMultiModel(camera_id=camera_id, rtsp_url=rtsp_link,
+                                                          model_paths={category: self.model_paths[category] for category in categories})
+                    processor.stream.start()
+                    self.camera_processors[camera_id] = processor
+                    logging.info(f"Camera {camera_id}: Initialized for {', '.join(categories)}")
+                except RabsException as e:
+                    logging.error(f"Camera {camera_id}: Initialization failed: {str(e)}")
+
+        def _streams(self):
+            """Streams the analysis loop waits on when no camera had a new frame"""
+            return (processor.stream for processor in self.camera_processors.values())
+
+        def _analyse_pending(self) -> bool:
+            """One pass of the analysis loop: every category on each camera that has a new frame, no drawing"""
+            analysed = False
+            for processor in self.camera_processors.values():
+                if processor.stream.stopped:
+                    continue
+                ret, envelope = processor.stream.read_envelope()
+                if ret:
+                    latency_tracker.frame_consumed(envelope, self.category)
+                    processor.analyse(envelope.frame, envelope=envelope)
+                    analysed = True
+            return analysed
+
+        def get_video_frames(self):
+            """Generator function to yield video frames as bytes for HTTP streaming"""
+            logging.info("Streaming multi-model camera video frames")
+
+            # Canvas and tiles are allocated per layout, not per tick
+            compositor = GridCompositor((320, 240))
+            shown = {}
+
+            while self.is_running:
+                displayed = []
+                active = [(camera_id, processor) for camera_id, processor in self.camera_processors.items()
+                          if not processor.stream.stopped]
+                if active:
+                    grid_display = compositor.layout(camera_id for camera_id, _ in active)
+                    for camera_id, processor in active:
+                        state = processor.latest
+                        processed_frame = render_analysed(processor, state)
+                        if processed_frame is not None and shown.get(camera_id) is not state:
+                            shown[camera_id] = state
+                            if state.envelope is not None:
+                                displayed.append(state.envelope)
+                        compositor.place(camera_id, processed_frame)
+
+                    _, buffer = cv2.imencode(".jpg", grid_display)
+                    yield (b"--frame\r\n"
+                        b"Content-Type: image/jpeg\r\n\r\n" +
+                        buffer.tobytes() + b"\r\n")
+                    latency_tracker.frames_displayed(displayed)
+
+                time.sleep(0.05)  # Small delay to control FPS
+
+        def stop(self) -> None:
+            """Stop the camera system"""
+            self.is_running = False
+            self.analysis.stop()
+            for processor in self.camera_processors.values():
+                processor.stream.stop()
+            cv2.destroyAllWindows()
+            logging.info("Multi-model camera system stopped")
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+
+
 ####################################################################################################################
                             ## Opencv GPU Streaming Fire  Detection ##
 ####################################################################################################################
@@ -1316,10 +1959,11 @@ class CameraStreamGPU:
 
 class MultiCameraSystemGPU:
     try:
-        def __init__(self, email: str, model_path:str, category:str):
+        def __init__(self, email: str, model_path:str, category:str, camera_data: Optional[list] = None):
             self.email = email
             self.model_path = model_path
             self.category = category
+            self.camera_data = camera_data  # overrides MongoDB, e.g. synthetic_camera_data() for load tests
             self.camera_processors = {}
             self.is_running = False
             self.mongo_handler = MongoDBHandlerSaving()
@@ -1328,7 +1972,7 @@ class MultiCameraSystemGPU:
 
 
         def _initialize_cameras(self) -> None:
-            camera_data = self.mongo_handler.fetch_camera_rtsp_by_email_and_category(email = self.email, category = self.category)
+            camera_data = self.camera_data or self.mongo_handler.fetch_camera_rtsp_by_email_and_category(email = self.email, category = self.category)
 
             if not camera_data:
                 logging.error(f"No camera data found for email: {self.email} and {self.category}")
@@ -1419,6 +2063,8 @@ class CameraProcessorGPU:
         self.rtsp_url = rtsp_url
         self.category   = category
         
+        # Not motion-gated: MotionGate works on host frames, and downloading every GpuMat to check it would
+        # cost what CUDA decoding saves
         self.stream = CameraStreamGPU(rtsp_url, camera_id)
         self.window_name = f'Camera {self.camera_id}'
         self.last_motion_time = None
@@ -1430,7 +2076,7 @@ class CameraProcessorGPU:
 
     def _initialize_model(self, model_path: str) -> None:
         try:
-            self.model = YOLO(model_path)
+            self.model = model_pool.acquire(model_path, task="obb")
             logging.info(f"Camera {self.camera_id}: Model initialized successfully")
         except Exception as e:
             logging.error(f"Camera {self.camera_id}: Model initialization failed: {str(e)}")
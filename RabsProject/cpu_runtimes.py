@@ -0,0 +1,237 @@
+import os, sys
+import ast
+import shutil
+import hashlib
+import importlib.util
+from threading import Lock
+from typing import Optional
+import cv2
+import numpy as np
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.detections import Detections
+from RabsProject.preprocess import letterbox, to_blob
+
+
+MODEL_RUNTIME = os.getenv("MODEL_RUNTIME", "torch")   # "torch", "onnx" or "openvino"
+INT8_MODELS = {name.strip() for name in os.getenv("INT8_MODELS", "").split(",") if name.strip()}  # e.g. "smoke,ppe"
+INFER_THREADS = int(os.getenv("INFER_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+NMS_MAX_WH = 7680       # class offset for class-aware NMS, as in ultralytics
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR")  # default: a .cache folder next to the weights
+
+RUNTIME_PACKAGES = {"torch": (), "onnx": ("onnx", "onnxruntime"), "openvino": ("openvino",)}
+
+_hash_cache = {}        # (path, mtime, size) -> sha256 prefix
+
+
+def missing_packages(names) -> list:
+    return [name for name in names if importlib.util.find_spec(name) is None]
+
+
+def check_runtime(runtime: str) -> None:
+    """Fail at startup rather than at the first camera when MODEL_RUNTIME is unknown or not installed"""
+    if runtime not in RUNTIME_PACKAGES:
+        raise ValueError(f"Unknown MODEL_RUNTIME {runtime!r}, expected one of {', '.join(RUNTIME_PACKAGES)}")
+    missing = missing_packages(RUNTIME_PACKAGES[runtime])
+    if missing:
+        raise ImportError(f"MODEL_RUNTIME={runtime} needs {', '.join(missing)}: pip install -r requirements-cpu.txt")
+
+
+def model_precision(model_path: str, runtime: str) -> str:
+    """int8 for models listed in INT8_MODELS (ONNX Runtime only), otherwise fp32"""
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return "int8" if runtime == "onnx" and stem in INT8_MODELS else "fp32"
+
+
+def weights_hash(model_path: str) -> str:
+    """Short sha256 of the weights file; cached per (path, mtime, size) so it is read once per process"""
+    stat = os.stat(model_path)
+    key = (os.path.abspath(model_path), stat.st_mtime_ns, stat.st_size)
+    digest = _hash_cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(model_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = _hash_cache[key] = sha.hexdigest()[:16]
+    return digest
+
+
+def artifact_path(model_path: str, suffix: str) -> str:
+    """Cache location of a compiled artifact, keyed by the weights' content so retrained weights never hit a stale file"""
+    cache_dir = ARTIFACT_CACHE_DIR or os.path.join(os.path.dirname(os.path.abspath(model_path)), ".cache")
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{weights_hash(model_path)}{suffix}")
+
+
+def export_model(model_path: str, runtime: str, imgsz: Optional[int] = None) -> str:
+    """Path of the cached ONNX file / OpenVINO directory for `model_path`, exporting it with ultralytics on a miss"""
+    target = artifact_path(model_path, ".onnx" if runtime == "onnx" else "_openvino_model")
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+    logging.info(f"Exporting {model_path} to {runtime} (cache miss for {target})")
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    exported = str(YOLO(model_path).export(format=runtime, dynamic=True, **kwargs))
+
+    # ultralytics writes next to the weights; move it into the cache under its content key
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = f"{target}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.move(exported, staging)
+    os.replace(staging, target)
+    return target
+
+
+def _xywh2xyxy(boxes: np.ndarray) -> np.ndarray:
+    xyxy = np.empty_like(boxes)
+    half_w, half_h = boxes[:, 2] / 2, boxes[:, 3] / 2
+    xyxy[:, 0] = boxes[:, 0] - half_w
+    xyxy[:, 1] = boxes[:, 1] - half_h
+    xyxy[:, 2] = boxes[:, 0] + half_w
+    xyxy[:, 3] = boxes[:, 1] + half_h
+    return xyxy
+
+
+def _candidates(pred: np.ndarray, nc: int, conf: float, classes: Optional[list]) -> tuple:
+    """Best class and score per anchor, filtered by confidence and class; pred is (channels, anchors)"""
+    scores = pred[4:4 + nc]
+    cls = scores.argmax(0)
+    best = np.take_along_axis(scores, cls[None], 0)[0]
+    keep = best > conf
+    if classes is not None:
+        keep &= np.isin(cls, classes)
+    return keep, best[keep], cls[keep]
+
+
+def decode_boxes(pred: np.ndarray, nc: int, conf: float = 0.25, iou: float = 0.7,
+                 classes: Optional[list] = None, max_det: int = 300) -> np.ndarray:
+    """Raw detect head output (4 + nc, anchors) -> (N, 6) x1, y1, x2, y2, conf, cls after class-aware NMS"""
+    keep, scores, cls = _candidates(pred, nc, conf, classes)
+    if not keep.any():
+        return np.zeros((0, 6), dtype=np.float32)
+    boxes = pred[:4, keep].T
+    # NMSBoxes wants x, y, w, h; shifting each class far apart keeps NMS within a class
+    nms_boxes = boxes.copy()
+    nms_boxes[:, :2] -= nms_boxes[:, 2:4] / 2
+    nms_boxes[:, :2] += (cls * NMS_MAX_WH)[:, None]
+    index = np.asarray(cv2.dnn.NMSBoxes(nms_boxes, scores, conf, iou), dtype=int).reshape(-1)[:max_det]
+    return np.concatenate([_xywh2xyxy(boxes[index]), scores[index, None], cls[index, None]], axis=1).astype(np.float32)
+
+
+def decode_obb(pred: np.ndarray, nc: int, conf: float = 0.25, iou: float = 0.7,
+               classes: Optional[list] = None, max_det: int = 300) -> np.ndarray:
+    """Raw OBB head output (4 + nc + 1, anchors) -> (N, 7) cx, cy, w, h, rotation, conf, cls after rotated NMS"""
+    keep, scores, cls = _candidates(pred, nc, conf, classes)
+    if not keep.any():
+        return np.zeros((0, 7), dtype=np.float32)
+    boxes = pred[:4, keep].T
+    angle = pred[4 + nc, keep]
+
+    # Same regularization as ultralytics' regularize_rboxes: angle in [0, pi/2), w/h swapped to match
+    swap = angle % np.pi >= np.pi / 2
+    boxes[swap, 2], boxes[swap, 3] = boxes[swap, 3], boxes[swap, 2].copy()
+    angle = angle % (np.pi / 2)
+
+    centers = boxes[:, :2] + (cls * NMS_MAX_WH)[:, None]
+    rects = [((float(x), float(y)), (float(w), float(h)), float(a))
+             for (x, y), (w, h), a in zip(centers, boxes[:, 2:4], np.degrees(angle))]
+    index = np.asarray(cv2.dnn.NMSBoxesRotated(rects, scores.tolist(), conf, iou), dtype=int).reshape(-1)[:max_det]
+    return np.concatenate([boxes[index], angle[index, None], scores[index, None], cls[index, None]], axis=1).astype(np.float32)
+
+
+class _OnnxSession:
+    """onnxruntime session tuned for CPU; run() is thread-safe"""
+
+    def __init__(self, path: str, threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.metadata = self.session.get_modelmeta().custom_metadata_map
+
+    def run(self, blob: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class _OpenVINOSession:
+    """OpenVINO compiled model; one infer request shared under a lock"""
+
+    def __init__(self, path: str, threads: int):
+        import yaml
+        import openvino as ov
+
+        xml = next(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".xml"))
+        core = ov.Core()
+        self.compiled = core.compile_model(core.read_model(xml), "CPU",
+                                           {"INFERENCE_NUM_THREADS": threads, "PERFORMANCE_HINT": "LATENCY"})
+        self.request = self.compiled.create_infer_request()
+        self.lock = Lock()
+        with open(os.path.join(path, "metadata.yaml")) as file:
+            self.metadata = {key: str(value) for key, value in yaml.safe_load(file).items()}
+
+    def run(self, blob: np.ndarray) -> np.ndarray:
+        with self.lock:
+            return self.request.infer({0: blob})[0].copy()
+
+
+class RuntimeModelHandle:
+    """ONNX Runtime / OpenVINO model with the ModelHandle surface the processors and scheduler use.
+
+    Preprocessing is the ultralytics letterbox, decoding is vectorized numpy plus OpenCV NMS, and the
+    output is rebuilt into ultralytics Results so post-processing is identical to the torch path.
+    """
+    try:
+        def __init__(self, model_path: str, runtime: str = MODEL_RUNTIME, threads: int = INFER_THREADS,
+                     precision: Optional[str] = None):
+            from RabsProject.quantization import int8_path
+
+            self.model_path = model_path
+            self.runtime = runtime
+            self.precision = precision or model_precision(model_path, runtime)
+            if self.precision == "int8":
+                path = int8_path(model_path)
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"{path} not found; run quantize_benchmark.py quantize for {model_path}")
+            else:
+                path = export_model(model_path, runtime)
+            self.session = _OnnxSession(path, threads) if runtime == "onnx" else _OpenVINOSession(path, threads)
+
+            metadata = self.session.metadata
+            self.names = ast.literal_eval(metadata["names"]) if isinstance(metadata.get("names"), str) else metadata.get("names", {})
+            self.task = metadata.get("task", "detect")
+            imgsz = ast.literal_eval(str(metadata.get("imgsz", "640")))
+            self.imgsz = int(max(imgsz)) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+            self.batch_key = (os.path.abspath(model_path), runtime, self.precision)
+            self.ready = False      # set by the model pool once warm-up has run
+            logging.info(f"Loaded {path} on {runtime} ({self.task}, {self.precision}, imgsz {self.imgsz}, {threads} threads)")
+
+        def _decode(self, pred: np.ndarray, kwargs: dict) -> np.ndarray:
+            decode = decode_obb if self.task == "obb" else decode_boxes
+            return decode(pred, len(self.names), conf=kwargs.get("conf", 0.25), iou=kwargs.get("iou", 0.7),
+                          classes=kwargs.get("classes"), max_det=kwargs.get("max_det", 300))
+
+        def predict_blob(self, blob: np.ndarray, **kwargs) -> list:
+            """Predict on a letterboxed NCHW blob; Detections in blob coordinates"""
+            output = self.session.run(blob)
+            kind = "obb" if self.task == "obb" else "boxes"
+            return [Detections(kind, self._decode(pred, kwargs), blob.shape[2:]) for pred in output]
+
+        def predict(self, source, **kwargs) -> list:
+            frames = source if isinstance(source, list) else [source]
+            letterboxed = [letterbox(frame, self.imgsz) for frame in frames]
+            blob = np.concatenate([to_blob(image) for image, _, _ in letterboxed])
+            detections = self.predict_blob(blob, **kwargs)
+            return [d.unletterboxed(ratio, pad, frame.shape[:2]).to_result(frame, self.names)
+                    for d, frame, (_, ratio, pad) in zip(detections, frames, letterboxed)]
+
+        def __call__(self, source, **kwargs) -> list:
+            return self.predict(source, **kwargs)
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class Detections:
+    """Compact, picklable detections: one float32 array in ultralytics' own column layout.
+
+    kind "boxes": x1, y1, x2, y2, [track_id], conf, cls
+    kind "obb":   cx, cy, w, h, rotation, [track_id], conf, cls
+    Small enough to send between processes, and rebuilt into an ultralytics Results for drawing.
+    """
+    __slots__ = ("kind", "data", "shape")
+
+    def __init__(self, kind: str, data: np.ndarray, shape: tuple):
+        self.kind = kind
+        self.data = data
+        self.shape = shape
+
+    @classmethod
+    def from_result(cls, result) -> 'Detections':
+        if getattr(result, "obb", None) is not None:
+            return cls("obb", result.obb.data.cpu().numpy().astype(np.float32), result.orig_shape)
+        if getattr(result, "boxes", None) is not None:
+            return cls("boxes", result.boxes.data.cpu().numpy().astype(np.float32), result.orig_shape)
+        return cls("boxes", np.zeros((0, 6), dtype=np.float32), result.orig_shape)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def has_ids(self) -> bool:
+        return self.data.shape[1] == (8 if self.kind == "obb" else 7)
+
+    @property
+    def conf(self) -> np.ndarray:
+        return self.data[:, -2]
+
+    @property
+    def cls(self) -> np.ndarray:
+        return self.data[:, -1].astype(int)
+
+    @property
+    def ids(self):
+        return self.data[:, -3].astype(int) if self.has_ids else None
+
+    def select(self, mask: np.ndarray) -> 'Detections':
+        """Subset by a boolean mask or index array, e.g. detections.select(detections.cls == 0)"""
+        return Detections(self.kind, self.data[mask], self.shape)
+
+    def corners(self) -> np.ndarray:
+        """(N, 4, 2) float32 corner points of every box, for one cv2.polylines call over all of them"""
+        if self.kind == "boxes":
+            x1, y1, x2, y2 = self.data[:, 0], self.data[:, 1], self.data[:, 2], self.data[:, 3]
+            return np.stack([np.stack([x1, y1], -1), np.stack([x2, y1], -1),
+                             np.stack([x2, y2], -1), np.stack([x1, y2], -1)], axis=1)
+        # Same construction as ultralytics' xywhr2xyxyxyxy; rotation is in radians
+        center = self.data[:, :2]
+        w, h, r = self.data[:, 2:3], self.data[:, 3:4], self.data[:, 4:5]
+        cos, sin = np.cos(r), np.sin(r)
+        along_w = np.concatenate([w / 2 * cos, w / 2 * sin], axis=1)
+        along_h = np.concatenate([-h / 2 * sin, h / 2 * cos], axis=1)
+        return np.stack([center + along_w + along_h, center + along_w - along_h,
+                         center - along_w - along_h, center - along_w + along_h], axis=1)
+
+    def scaled(self, scale: float, shape: tuple) -> 'Detections':
+        """Coordinates mapped back by a uniform scale, e.g. after inference on a downsized copy"""
+        if scale == 1.0:
+            return Detections(self.kind, self.data, shape)
+        data = self.data.copy()
+        data[:, :4] *= scale  # xyxy or cx, cy, w, h; rotation is unaffected by uniform scaling
+        return Detections(self.kind, data, shape)
+
+    def unletterboxed(self, ratio: float, pad: tuple, shape: tuple) -> 'Detections':
+        """Coordinates mapped from a letterboxed model input (see preprocess.letterbox) back onto the frame"""
+        data = self.data.copy()
+        if self.kind == "obb":
+            data[:, 0] -= pad[0]
+            data[:, 1] -= pad[1]
+        else:
+            data[:, [0, 2]] -= pad[0]
+            data[:, [1, 3]] -= pad[1]
+        data[:, :4] /= ratio
+        if self.kind == "boxes":
+            data[:, [0, 2]] = data[:, [0, 2]].clip(0, shape[1])
+            data[:, [1, 3]] = data[:, [1, 3]].clip(0, shape[0])
+        return Detections(self.kind, data, shape)
+
+    def to_result(self, frame: np.ndarray, names: dict):
+        """Rebuild an ultralytics Results around `frame` so existing post-processing runs unchanged"""
+        import torch
+        from ultralytics.engine.results import Results
+
+        data = torch.from_numpy(self.data)
+        if self.kind == "obb":
+            return Results(frame, path="", names=names, obb=data)
+        return Results(frame, path="", names=names, boxes=data)
@@ -0,0 +1,114 @@
+import sys
+import time
+from collections import deque
+from threading import Lock
+from typing import Optional
+import numpy as np
+from RabsProject.exception import RabsException
+
+
+class FrameEnvelope:
+    """A decoded frame plus where and when it came from; carried from capture to alert/screen.
+
+    capture_ts is time.monotonic() at capture, so stage latencies are immune to wall-clock jumps;
+    wall_time is kept for display and for joining with logs.
+    """
+    __slots__ = ("camera_id", "seq", "capture_ts", "wall_time", "shape", "frame", "stamps", "frozen")
+
+    def __init__(self, camera_id, seq: int, frame: np.ndarray, capture_ts: Optional[float] = None,
+                 wall_time: Optional[float] = None):
+        self.camera_id = camera_id
+        self.seq = seq
+        self.frame = frame
+        self.shape = frame.shape
+        self.capture_ts = time.monotonic() if capture_ts is None else capture_ts
+        self.wall_time = time.time() if wall_time is None else wall_time
+        self.stamps = []
+        self.frozen = False     # set by the capture side's FreezeWatchdog; processors skip inference on it
+
+    def stamp(self, stage: str) -> float:
+        """Record that `stage` finished now; returns seconds since capture"""
+        now = time.monotonic()
+        self.stamps.append((stage, now))
+        return now - self.capture_ts
+
+    def fork(self) -> 'FrameEnvelope':
+        """Envelope for one more consumer of the same frame: shares the (read-only) frame, copies the
+        capture-side stamps and keeps its own from here on, so consumers don't stamp each other's frames"""
+        envelope = FrameEnvelope(self.camera_id, self.seq, self.frame, self.capture_ts, self.wall_time)
+        envelope.stamps = list(self.stamps)
+        envelope.frozen = self.frozen
+        return envelope
+
+    def timings(self) -> dict:
+        """Milliseconds from capture to the end of each stamped stage"""
+        return {stage: round((ts - self.capture_ts) * 1000, 1) for stage, ts in self.stamps}
+
+
+class LatencyTracker:
+    """Rolling per-camera latency percentiles and dropped-frame counts"""
+    try:
+        def __init__(self, window: int = 500):
+            self.window = window
+            self._lock = Lock()
+            self._samples = {}      # (camera_id, metric) -> deque of seconds
+            self._last_seq = {}     # (camera_id, consumer) -> last seq consumed
+            self._dropped = {}      # (camera_id, consumer) -> frames that consumer skipped between consumed seqs
+
+        def observe(self, camera_id, metric: str, seconds: float) -> None:
+            key = (str(camera_id), metric)
+            with self._lock:
+                samples = self._samples.get(key)
+                if samples is None:
+                    samples = self._samples[key] = deque(maxlen=self.window)
+                samples.append(seconds)
+
+        def frame_consumed(self, envelope: FrameEnvelope, consumer: str) -> None:
+            """Note that `consumer` picked up this frame; gaps in seq are frames it never saw"""
+            envelope.stamp("received")
+            key = (envelope.camera_id, consumer)
+            with self._lock:
+                last = self._last_seq.get(key)
+                self._last_seq[key] = envelope.seq
+                if last is not None and envelope.seq > last + 1:
+                    dropped_key = (str(envelope.camera_id), consumer)
+                    self._dropped[dropped_key] = self._dropped.get(dropped_key, 0) + envelope.seq - last - 1
+
+        def frame_alerted(self, envelope: Optional[FrameEnvelope]) -> None:
+            if envelope is not None:
+                self.observe(envelope.camera_id, "capture_to_alert", envelope.stamp("alert"))
+
+        def frames_displayed(self, envelopes: list) -> None:
+            for envelope in envelopes:
+                self.observe(envelope.camera_id, "capture_to_screen", envelope.stamp("displayed"))
+
+        def reset(self) -> None:
+            with self._lock:
+                self._samples.clear()
+                self._last_seq.clear()
+                self._dropped.clear()
+
+        def snapshot(self) -> dict:
+            """{camera_id: {metric: {count, p50_ms, p95_ms, max_ms}, frames_dropped: {consumer: n}}}"""
+            with self._lock:
+                samples = {key: list(values) for key, values in self._samples.items()}
+                dropped = dict(self._dropped)
+
+            report = {}
+            for (camera, metric), values in samples.items():
+                values = np.asarray(values) * 1000
+                report.setdefault(camera, {})[metric] = {
+                    "count": int(values.size),
+                    "p50_ms": round(float(np.percentile(values, 50)), 1),
+                    "p95_ms": round(float(np.percentile(values, 95)), 1),
+                    "max_ms": round(float(values.max()), 1),
+                }
+            for (camera, consumer), count in dropped.items():
+                report.setdefault(camera, {}).setdefault("frames_dropped", {})[consumer] = count
+            return report
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,461 @@
+import os, sys
+import time
+import random
+import subprocess
+from typing import Optional
+from urllib.parse import parse_qs
+import cv2
+import numpy as np
+from vidgear.gears import CamGear
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+
+
+ANALYSIS_FPS = float(os.getenv("ANALYSIS_FPS", "0"))  # 0 = deliver every frame the camera sends
+# CamGear decodes every frame in its own thread, so rate control only saves work with the grab backend
+CAPTURE_BACKEND = os.getenv("CAPTURE_BACKEND", "opencv" if ANALYSIS_FPS > 0 else "camgear")
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+FFMPEG_OUTPUT_SIZE = os.getenv("FFMPEG_OUTPUT_SIZE", "")  # "640x640" exact, "640" width keeping aspect, "" native
+FFMPEG_BUFFER_POOL = int(os.getenv("FFMPEG_BUFFER_POOL", "6"))
+
+# Plain local video paths (e.g. "Videos/rabs1.mp4" in MongoDB) play back in real time instead of flat out
+REPLAY_LOCAL_FILES = os.getenv("REPLAY_LOCAL_FILES", "1") == "1"
+
+
+class FrameSource:
+    """Base for the decoders CameraStream can sit on: read() returns a BGR frame or None"""
+
+    # True when read() hands out arrays it will overwrite on a later read; CameraStream copies those on publish
+    recycles_frames = False
+
+    def __init__(self, camera_id, target_fps: float = ANALYSIS_FPS):
+        self.camera_id = camera_id
+        self.target_fps = target_fps
+        self.fps = 30.0
+        self.frames_seen = 0
+        self.frames_decoded = 0
+        self._budget = 0.0
+
+    def _set_fps(self, fps: Optional[float]) -> None:
+        if not fps or fps <= 0:
+            fps = 30.0
+            logging.warning(f"Camera {self.camera_id}: Invalid FPS detected, defaulting to {fps}")
+        self.fps = fps
+
+    def _due(self) -> bool:
+        """Count one incoming frame and decide whether it should be delivered at the target rate"""
+        self.frames_seen += 1
+        if self.target_fps <= 0 or self.target_fps >= self.fps:
+            return True
+        # Frame-count accumulator rather than wall clock, so files and live cameras pace the same way
+        self._budget += self.target_fps / self.fps
+        if self._budget >= 1.0:
+            self._budget -= 1.0
+            return True
+        return False
+
+    def inherit_stats(self, other: 'FrameSource') -> None:
+        """Carry counters across a reconnect so the reported skip ratio covers the stream's lifetime"""
+        self.frames_seen += other.frames_seen
+        self.frames_decoded += other.frames_decoded
+
+    def resume_from(self, other: 'FrameSource') -> None:
+        """Take over from the source this one replaces on a reconnect; raise if the camera is not back yet"""
+        self.inherit_stats(other)
+
+    def decode_stats(self) -> dict:
+        skipped = self.frames_seen - self.frames_decoded
+        return {
+            "source_fps": round(self.fps, 2),
+            "target_fps": self.target_fps,
+            "frames_seen": int(self.frames_seen),
+            "frames_decoded": self.frames_decoded,
+            "skip_ratio": round(skipped / self.frames_seen, 3) if self.frames_seen else 0.0,
+        }
+
+    def read(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+
+class CamGearSource(FrameSource):
+    """vidgear CamGear; frames are already decoded when we see them, so skipping only saves downstream work"""
+
+    def __init__(self, source: str, camera_id, target_fps: float = ANALYSIS_FPS):
+        super().__init__(camera_id, target_fps)
+        self.cap = CamGear(source=source, logging=True).start()
+        self._set_fps(self.cap.stream.get(cv2.CAP_PROP_FPS))
+
+    def read(self) -> Optional[np.ndarray]:
+        while True:
+            frame = self.cap.read()
+            if frame is None:
+                return None
+            if self._due():
+                self.frames_decoded += 1
+                return frame
+
+    def stop(self) -> None:
+        self.cap.stop()
+
+
+class OpenCVGrabSource(FrameSource):
+    """cv2.VideoCapture driven with grab()/retrieve(): skipped frames are demuxed and grabbed but never
+    converted to BGR or copied out. The codec still has to decode reference frames (H.264/H.265 P-frames
+    depend on them), so the saving is the colour conversion, the copy and everything after it."""
+
+    def __init__(self, source: str, camera_id, target_fps: float = ANALYSIS_FPS):
+        super().__init__(camera_id, target_fps)
+        self.cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Camera {camera_id}: Unable to open source")
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._set_fps(self.cap.get(cv2.CAP_PROP_FPS))
+
+    def read(self) -> Optional[np.ndarray]:
+        while True:
+            if not self.cap.grab():
+                return None
+            if not self._due():
+                continue
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                return None
+            self.frames_decoded += 1
+            return frame
+
+    def stop(self) -> None:
+        self.cap.release()
+
+
+def probe_video(source: str, timeout: float = 15.0) -> tuple[int, int, float]:
+    """(width, height, fps) of the first video stream, via ffprobe"""
+    cmd = [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate", "-of", "csv=p=0"]
+    if source.startswith("rtsp"):
+        cmd += ["-rtsp_transport", "tcp"]
+    out = subprocess.run(cmd + [source], capture_output=True, text=True, timeout=timeout, check=True).stdout
+    width, height, *rates = out.strip().splitlines()[0].split(",")
+
+    fps = 0.0
+    for rate in rates:
+        num, _, den = rate.partition("/")
+        if float(num or 0) > 0 and float(den or 1) > 0:
+            fps = float(num) / float(den or 1)
+            break
+    return int(width), int(height), fps
+
+
+def parse_output_size(spec: str, width: int, height: int) -> tuple[int, int]:
+    """Resolve FFMPEG_OUTPUT_SIZE against the source size; odd sizes are rounded to even for the scaler"""
+    if not spec:
+        return width, height
+    if "x" in spec:
+        w, h = (int(v) for v in spec.lower().split("x"))
+        return w, h
+    w = int(spec)
+    return w, max(2, int(round(height * w / width / 2)) * 2)
+
+
+class FFmpegSource(FrameSource):
+    """ffmpeg subprocess that scales (and optionally drops frames with the fps filter) in C and writes raw
+    BGR into a pipe; frames are read straight into a small pool of preallocated arrays.
+
+    A frame array is reused FFMPEG_BUFFER_POOL reads later, so the source sets recycles_frames and
+    CameraStream publishes a copy; anything else reading it must copy before the pool comes round.
+    """
+
+    recycles_frames = True
+
+    def __init__(self, source: str, camera_id, target_fps: float = ANALYSIS_FPS,
+                 output_size: str = FFMPEG_OUTPUT_SIZE, pool_size: int = FFMPEG_BUFFER_POOL):
+        super().__init__(camera_id, target_fps)
+        src_width, src_height, src_fps = probe_video(source)
+        self._set_fps(src_fps)
+        self.width, self.height = parse_output_size(output_size, src_width, src_height)
+
+        filters = []
+        # The fps filter drops frames inside ffmpeg, so the frames it consumed are inferred from the rate
+        self._seen_per_frame = 1.0
+        if 0 < target_fps < self.fps:
+            filters.append(f"fps={target_fps}")
+            self._seen_per_frame = self.fps / target_fps
+        if (self.width, self.height) != (src_width, src_height):
+            filters.append(f"scale={self.width}:{self.height}")
+
+        cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if source.startswith("rtsp"):
+            cmd += ["-rtsp_transport", "tcp"]
+        cmd += ["-i", source, "-an", "-sn"]
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        cmd += ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+
+        self.frame_bytes = self.width * self.height * 3
+        self._buffers = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(max(2, pool_size))]
+        self._next = 0
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        logging.info(f"Camera {camera_id}: ffmpeg decoding {src_width}x{src_height}@{self.fps:.1f} "
+                     f"-> {self.width}x{self.height} with filters {filters or 'none'}")
+
+    def read(self) -> Optional[np.ndarray]:
+        frame = self._buffers[self._next]
+        view = memoryview(frame.reshape(-1))
+        got = 0
+        while got < self.frame_bytes:
+            n = self.proc.stdout.readinto(view[got:])
+            if not n:
+                return None
+            got += n
+
+        self._next = (self._next + 1) % len(self._buffers)
+        self.frames_decoded += 1
+        self.frames_seen += self._seen_per_frame
+        return frame
+
+    def stop(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        self.proc.stdout.close()
+
+
+class ReplaySource(FrameSource):
+    """Local video played back like a live camera: paced to its native (or a given) rate, optionally
+    looping, with per-frame jitter and scheduled disconnects for reproducible offline benchmarks.
+
+    Configured through a URL, e.g. replay://Videos/rabs1.mp4?fps=25&loop=1&jitter_ms=20&disconnect_every=60&disconnect_for=5
+    """
+
+    def __init__(self, path: str, camera_id, target_fps: float = ANALYSIS_FPS, fps: float = 0, speed: float = 1.0,
+                 loop: bool = True, jitter_ms: float = 0, disconnect_every: float = 0, disconnect_for: float = 0,
+                 seed: Optional[int] = None):
+        super().__init__(camera_id, target_fps)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Camera {camera_id}: Unable to open replay file {path}")
+        self._set_fps(fps or self.cap.get(cv2.CAP_PROP_FPS))
+        self.loop = loop
+        self.interval = 1.0 / (self.fps * speed)
+        self.jitter = jitter_ms / 1000.0
+        self.disconnect_every = disconnect_every
+        self.disconnect_for = disconnect_for
+        self._rng = random.Random(seed)
+        self._next_frame_at = None
+        self._position = 0
+        self._disconnect_until = 0.0
+        self._next_disconnect = time.monotonic() + disconnect_every if disconnect_every > 0 else None
+
+    @classmethod
+    def from_url(cls, url: str, camera_id, target_fps: float = ANALYSIS_FPS) -> 'ReplaySource':
+        path, _, query = url[len("replay://"):].partition("?")
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        return cls(path, camera_id, target_fps,
+                   fps=float(params.get("fps", 0)),
+                   speed=float(params.get("speed", 1.0)),
+                   loop=params.get("loop", "1") not in ("0", "false"),
+                   jitter_ms=float(params.get("jitter_ms", 0)),
+                   disconnect_every=float(params.get("disconnect_every", 0)),
+                   disconnect_for=float(params.get("disconnect_for", 0)),
+                   seed=int(params["seed"]) if "seed" in params else None)
+
+    def _disconnected(self, now: float) -> bool:
+        if now < self._disconnect_until:
+            return True
+        if self._next_disconnect is not None and now >= self._next_disconnect:
+            logging.info(f"Camera {self.camera_id}: Simulated disconnect for {self.disconnect_for}s")
+            self._disconnect_until = now + self.disconnect_for
+            self._next_disconnect = now + self.disconnect_for + self.disconnect_every
+            return True
+        return False
+
+    def resume_from(self, other: FrameSource) -> None:
+        """A reconnect continues the replay where it stopped, on the same disconnect schedule; during a
+        simulated disconnect the reconnect itself fails, so the supervisor backs off as for a real camera"""
+        if isinstance(other, ReplaySource) and other.path == self.path:
+            remaining = other._disconnect_until - time.monotonic()
+            if remaining > 0:
+                raise ConnectionError(f"Camera {self.camera_id}: Simulated disconnect, back in {remaining:.1f}s")
+            self._rng, self._next_disconnect = other._rng, other._next_disconnect
+            self._position = other._position
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self._position)
+        super().resume_from(other)
+
+    def _wait_for_slot(self) -> None:
+        """Sleep until the next frame is due on the source clock, plus jitter that does not accumulate"""
+        now = time.monotonic()
+        if self._next_frame_at is None or now - self._next_frame_at > 1.0:
+            # First frame, or we fell far behind (slow consumer, disconnect): restart the clock
+            self._next_frame_at = now
+        delay = self._next_frame_at - now
+        if self.jitter:
+            delay += self._rng.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame_at += self.interval
+
+    def read(self) -> Optional[np.ndarray]:
+        while True:
+            now = time.monotonic()
+            if self._disconnected(now):
+                time.sleep(min(self.interval, max(0.0, self._disconnect_until - now)))
+                return None
+
+            if not self.cap.grab():
+                if not self.loop or self.cap.get(cv2.CAP_PROP_FRAME_COUNT) < 1:
+                    return None
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self._position = 0
+                continue
+            self._position += 1
+
+            # Pace every source frame, delivered or skipped, so the clock matches a live camera
+            self._wait_for_slot()
+            if not self._due():
+                continue
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                return None
+            self.frames_decoded += 1
+            return frame
+
+    def stop(self) -> None:
+        self.cap.release()
+
+
+class SyntheticSource(FrameSource):
+    """Procedurally generated camera for load tests: no decoder, no network, deterministic per seed.
+
+    synthetic://<name>?w=640&h=480&fps=25&scene=moving&motion=1.0&objects=4&seed=7
+    scene is "moving" (rectangles), "fire" (flickering orange blobs) or "static" (never changes; the freeze
+    watchdog is off for synthetic sources, so it is still analysed rather than flagged frozen).
+    motion scales object speed; 0 freezes the objects.
+    """
+
+    SCENES = ("moving", "fire", "static")
+
+    def __init__(self, name: str, camera_id, target_fps: float = ANALYSIS_FPS, width: int = 640, height: int = 480,
+                 fps: float = 25, scene: str = "moving", motion: float = 1.0, objects: int = 4, seed: int = 0):
+        super().__init__(camera_id, target_fps)
+        if scene not in self.SCENES:
+            raise ValueError(f"Unknown synthetic scene: {scene}")
+        self.name = name
+        self.width, self.height = width, height
+        self._set_fps(fps)
+        self.scene = scene
+        self.motion = motion
+        self._rng = np.random.default_rng(seed)
+        self._next_frame_at = None
+        self._stopped = False
+
+        # Vertical gradient background, rendered once
+        ramp = np.linspace(40, 160, height, dtype=np.uint8)[:, None, None]
+        self.background = np.repeat(np.repeat(ramp, width, axis=1), 3, axis=2)
+        self.background[..., 0] //= 2
+        self.background = np.ascontiguousarray(self.background)
+
+        self.positions = self._rng.uniform((0, 0), (width, height), size=(objects, 2))
+        self.velocities = self._rng.uniform(-1, 1, size=(objects, 2)) * (min(width, height) / 4)
+        self.sizes = self._rng.uniform(0.05, 0.15, size=objects) * min(width, height)
+        self.colors = self._rng.integers(0, 256, size=(objects, 3))
+
+    @classmethod
+    def from_url(cls, url: str, camera_id, target_fps: float = ANALYSIS_FPS) -> 'SyntheticSource':
+        name, _, query = url[len("synthetic://"):].partition("?")
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        return cls(name, camera_id, target_fps,
+                   width=int(params.get("w", 640)),
+                   height=int(params.get("h", 480)),
+                   fps=float(params.get("fps", 25)),
+                   scene=params.get("scene", "moving"),
+                   motion=float(params.get("motion", 1.0)),
+                   objects=int(params.get("objects", 4)),
+                   seed=int(params.get("seed", 0)))
+
+    def _render(self) -> np.ndarray:
+        frame = self.background.copy()
+        if self.scene == "static":
+            return frame
+
+        dt = 1.0 / self.fps
+        self.positions += self.velocities * self.motion * dt
+        # Bounce off the edges
+        for axis, limit in ((0, self.width), (1, self.height)):
+            out = (self.positions[:, axis] < 0) | (self.positions[:, axis] > limit)
+            self.velocities[out, axis] *= -1
+            np.clip(self.positions[:, axis], 0, limit, out=self.positions[:, axis])
+
+        for (x, y), size, color in zip(self.positions.astype(int), self.sizes.astype(int), self.colors):
+            if self.scene == "fire":
+                flicker = self._rng.uniform(0.7, 1.3)
+                axes = (max(2, int(size * flicker / 2)), max(2, int(size * flicker)))
+                cv2.ellipse(frame, (x, y), axes, 0, 0, 360, (0, int(120 * flicker) % 256, 255), -1)
+                cv2.ellipse(frame, (x, y + axes[1] // 3), (axes[0] // 2, axes[1] // 2), 0, 0, 360, (80, 220, 255), -1)
+            else:
+                half = size // 2
+                cv2.rectangle(frame, (x - half, y - half), (x + half, y + half), tuple(int(c) for c in color), -1)
+        return frame
+
+    def read(self) -> Optional[np.ndarray]:
+        while not self._stopped:
+            now = time.monotonic()
+            if self._next_frame_at is None or now - self._next_frame_at > 1.0:
+                self._next_frame_at = now
+            if self._next_frame_at > now:
+                time.sleep(self._next_frame_at - now)
+            self._next_frame_at += 1.0 / self.fps
+
+            if not self._due():
+                # Objects keep moving while frames are skipped
+                if self.scene != "static":
+                    self.positions += self.velocities * self.motion / self.fps
+                continue
+            self.frames_decoded += 1
+            return self._render()
+        return None
+
+    def stop(self) -> None:
+        self._stopped = True
+
+
+def synthetic_camera_data(count: int, scene: str = "moving", width: int = 640, height: int = 480,
+                          fps: float = 25, motion: float = 1.0, prefix: str = "synthetic") -> list[dict]:
+    """Camera records in the shape MongoDB returns, for feeding N virtual cameras into a camera system"""
+    return [{
+        "camera_id": f"{prefix}_{i}",
+        "rtsp_link": f"synthetic://{prefix}_{i}?w={width}&h={height}&fps={fps}&scene={scene}&motion={motion}&seed={i}",
+    } for i in range(count)]
+
+
+def is_simulated_source(source: str) -> bool:
+    """Replay files and synthetic cameras, which repeat frames on purpose and never freeze like a network feed"""
+    return source.startswith(("synthetic://", "replay://")) or (REPLAY_LOCAL_FILES and os.path.isfile(source))
+
+
+def open_frame_source(source: str, camera_id, backend: str = CAPTURE_BACKEND,
+                      target_fps: float = ANALYSIS_FPS) -> FrameSource:
+    """Open the decoder for a camera URL with the configured backend"""
+    try:
+        if source.startswith("synthetic://"):
+            return SyntheticSource.from_url(source, camera_id, target_fps)
+        if source.startswith("replay://"):
+            return ReplaySource.from_url(source, camera_id, target_fps)
+        if REPLAY_LOCAL_FILES and os.path.isfile(source):
+            return ReplaySource(source, camera_id, target_fps)
+        if backend == "opencv":
+            return OpenCVGrabSource(source, camera_id, target_fps)
+        if backend == "camgear":
+            return CamGearSource(source, camera_id, target_fps)
+        if backend == "ffmpeg":
+            return FFmpegSource(source, camera_id, target_fps)
+        raise ValueError(f"Unknown capture backend: {backend}")
+    except Exception as e:
+        raise RabsException(e, sys) from e
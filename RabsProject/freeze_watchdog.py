@@ -0,0 +1,98 @@
+import os, sys
+import time
+import cv2
+import numpy as np
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+
+
+FREEZE_TIMEOUT = float(os.getenv("FREEZE_TIMEOUT", "10"))         # seconds of identical frames before a stream is frozen
+FREEZE_HASH_SIZE = int(os.getenv("FREEZE_HASH_SIZE", "16"))        # side of the grayscale thumbnail that gets hashed
+FREEZE_HASH_LEVELS = int(os.getenv("FREEZE_HASH_LEVELS", "32"))    # quantization steps, absorbs re-encode noise
+
+
+def frame_fingerprint(frame: np.ndarray, size: int = FREEZE_HASH_SIZE, levels: int = FREEZE_HASH_LEVELS) -> int:
+    """Hash of a quantized grayscale thumbnail; identical for a repeated image, cheap enough to run on every frame"""
+    h, w = frame.shape[:2]
+    # Stride down before resizing so a 4K frame costs the same as a 720p one
+    step = max(1, min(h, w) // (size * 8))
+    small = np.ascontiguousarray(frame[::step, ::step])
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(small, (size, size), interpolation=cv2.INTER_AREA)
+    return hash((thumb // (256 // levels)).tobytes())
+
+
+def mark_frozen(frame: np.ndarray) -> np.ndarray:
+    """Copy of the frame with a FROZEN banner, shown instead of running inference on a dead feed"""
+    marked = frame.copy()
+    cv2.putText(marked, "STREAM FROZEN", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+    return marked
+
+
+class FreezeWatchdog:
+    """Per-stream freeze detector: a stream whose fingerprint has not changed for `timeout` seconds is frozen.
+
+    Disabled for simulated sources (see frame_sources.is_simulated_source): a static synthetic scene or a
+    still stretch of a replay file is content, and flagging it would skip inference and loop reconnects.
+    """
+    try:
+        def __init__(self, camera_id, timeout: float = FREEZE_TIMEOUT, enabled: bool = True):
+            self.camera_id = camera_id
+            self.timeout = timeout
+            self.enabled = enabled
+            self.frozen = False
+            self.freeze_events = 0
+            self._fingerprint = None
+            self._unchanged_since = None
+            self._frozen_since = None
+            self._frozen_total = 0.0
+            self._last_report = None
+
+        def observe(self, frame: np.ndarray, now: float = None) -> bool:
+            """Fingerprint a new frame and return whether the stream is (still) frozen"""
+            if not self.enabled:
+                return False
+            now = time.monotonic() if now is None else now
+            fingerprint = frame_fingerprint(frame)
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                self._unchanged_since = now
+                if self.frozen:
+                    self._frozen_total += now - self._frozen_since
+                    logging.info(f"Camera {self.camera_id}: Stream recovered after {now - self._frozen_since:.1f}s frozen")
+                    self.frozen = False
+                    self._frozen_since = None
+                    self._last_report = None
+                return False
+
+            if not self.frozen and now - self._unchanged_since >= self.timeout:
+                self.frozen = True
+                self.freeze_events += 1
+                self._frozen_since = self._unchanged_since
+                logging.warning(f"Camera {self.camera_id}: Stream frozen, no change for {now - self._unchanged_since:.1f}s")
+            return self.frozen
+
+        def needs_reconnect(self, now: float = None) -> bool:
+            """True once per timeout period while frozen, so a reconnect that does not help is retried"""
+            if not self.frozen:
+                return False
+            now = time.monotonic() if now is None else now
+            if self._last_report is not None and now - self._last_report < self.timeout:
+                return False
+            self._last_report = now
+            return True
+
+        def stats(self) -> dict:
+            now = time.monotonic()
+            current = now - self._frozen_since if self.frozen else 0.0
+            return {
+                "enabled": self.enabled,
+                "frozen": self.frozen,
+                "frozen_for": round(current, 1),
+                "frozen_seconds_total": round(self._frozen_total + current, 1),
+                "freeze_events": self.freeze_events,
+            }
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
@@ -0,0 +1,49 @@
+import sys
+from math import ceil, sqrt
+from typing import Hashable, Optional
+import cv2
+import numpy as np
+from RabsProject.exception import RabsException
+
+
+class GridCompositor:
+    """Multi-camera grid for the MJPEG view. The canvas and one tile view per camera are allocated
+    once per layout; each tick resizes camera frames straight into their tiles, so building the grid
+    allocates nothing. The layout is only rebuilt when the set of cameras changes.
+    """
+    try:
+        def __init__(self, tile_size: tuple[int, int] = (320, 240)):
+            self.tile_size = tile_size      # (width, height), as cv2.resize takes it
+            self.canvas: Optional[np.ndarray] = None
+            self.tiles: dict[Hashable, np.ndarray] = {}
+            self._camera_ids: tuple = ()
+
+        def layout(self, camera_ids) -> np.ndarray:
+            """Square-ish grid for `camera_ids` in order; reallocated only if the cameras differ from last time"""
+            camera_ids = tuple(camera_ids)
+            if self.canvas is not None and camera_ids == self._camera_ids:
+                return self.canvas
+
+            width, height = self.tile_size
+            cols = ceil(sqrt(len(camera_ids))) if camera_ids else 1
+            rows = max(1, ceil(len(camera_ids) / cols))
+            # Unused cells stay black
+            self.canvas = np.zeros((rows * height, cols * width, 3), dtype=np.uint8)
+            self.tiles = {camera_id: self.canvas[(i // cols) * height:(i // cols + 1) * height,
+                                                 (i % cols) * width:(i % cols + 1) * width]
+                          for i, camera_id in enumerate(camera_ids)}
+            self._camera_ids = camera_ids
+            return self.canvas
+
+        def place(self, camera_id: Hashable, frame: Optional[np.ndarray]) -> None:
+            """Resize `frame` into the camera's tile in place; None blanks the tile"""
+            tile = self.tiles[camera_id]
+            if frame is None:
+                tile[:] = 0
+            elif frame.shape == tile.shape:
+                np.copyto(tile, frame)
+            else:
+                cv2.resize(frame, self.tile_size, dst=tile)
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
@@ -0,0 +1,84 @@
+import os, sys
+import time
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.analysis_loop import wait_for_frames
+
+
+INFER_MAX_BATCH = int(os.getenv("INFER_MAX_BATCH", "8"))
+INFER_MAX_WAIT_MS = float(os.getenv("INFER_MAX_WAIT_MS", "10"))
+
+
+class InferenceScheduler:
+    """Collects the newest frame from every camera of a system and runs one batched predict per model.
+
+    Processors opt in by exposing `model` (a pooled ModelHandle) and `inference_args()`; cameras that share
+    weights and arguments go into the same batch, capped at max_batch frames. collect() waits up to
+    max_wait for cameras that have not produced a new frame yet, trading a few ms of latency for fuller batches.
+    """
+    try:
+        def __init__(self, max_batch: int = INFER_MAX_BATCH, max_wait: float = INFER_MAX_WAIT_MS / 1000):
+            self.max_batch = max(1, max_batch)
+            self.max_wait = max_wait
+            self.batches = 0
+            self.batched_frames = 0
+
+        def collect(self, processors: dict) -> dict:
+            """{camera_id: FrameEnvelope} for every running camera that delivered a new frame"""
+            pending = {}
+            waiting = [camera_id for camera_id, processor in processors.items() if not processor.stream.stopped]
+            deadline = time.monotonic() + self.max_wait
+            while waiting:
+                still_waiting = []
+                for camera_id in waiting:
+                    ret, envelope = processors[camera_id].stream.read_envelope()
+                    if ret:
+                        pending[camera_id] = envelope
+                    else:
+                        still_waiting.append(camera_id)
+                waiting = still_waiting
+                if not pending or time.monotonic() >= deadline:
+                    # Nothing at all is ready: let the caller redraw instead of spinning here
+                    break
+                wait_for_frames((processors[camera_id].stream for camera_id in waiting),
+                                deadline - time.monotonic())
+            return pending
+
+        def run(self, processors: dict, pending: dict) -> dict:
+            """{camera_id: Results} from batched inference; cameras missing from it run their own predict"""
+            groups = {}
+            for camera_id, envelope in pending.items():
+                processor = processors[camera_id]
+                if envelope.frozen or not hasattr(processor, "inference_args"):
+                    continue
+                if not processor.should_infer(envelope.frame, envelope):
+                    # The motion gate found nothing new; analyse() keeps the last result
+                    continue
+                args = processor.inference_args()
+                key = (processor.model.batch_key, tuple(sorted(args.items())))
+                groups.setdefault(key, (processor.model, args, []))[2].append(camera_id)
+
+            results = {}
+            for model, args, camera_ids in groups.values():
+                for start in range(0, len(camera_ids), self.max_batch):
+                    chunk = camera_ids[start:start + self.max_batch]
+                    try:
+                        batch = model.predict([pending[camera_id].frame for camera_id in chunk], **args)
+                    except Exception as e:
+                        logging.error(f"Batched inference over cameras {chunk} failed: {str(e)}")
+                        continue
+                    for camera_id, result in zip(chunk, batch):
+                        pending[camera_id].stamp("inferred")
+                        results[camera_id] = result
+                    self.batches += 1
+                    self.batched_frames += len(chunk)
+            return results
+
+        def stats(self) -> dict:
+            return {
+                "batches": self.batches,
+                "mean_batch_size": round(self.batched_frames / self.batches, 2) if self.batches else 0.0,
+            }
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
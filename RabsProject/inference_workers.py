@@ -0,0 +1,274 @@
+import os, sys
+import time
+import uuid
+import queue
+import atexit
+import itertools
+import multiprocessing as mp
+from threading import Lock
+from typing import Optional
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.shared_frames import SharedFrameRing, ring_name_for, RING_SLOTS
+from RabsProject.detections import Detections
+from RabsProject.inference_scheduler import INFER_MAX_BATCH
+
+
+INFERENCE_WORKERS = os.getenv("INFERENCE_WORKERS", "")                 # e.g. "fire=2,smoke=1,ppe=1,truck=1"
+INFERENCE_WORKERS_DEFAULT = int(os.getenv("INFERENCE_WORKERS_DEFAULT", "1"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+INFERENCE_LOAD_TIMEOUT = float(os.getenv("INFERENCE_LOAD_TIMEOUT", "300"))
+INFERENCE_RING_MAX_HEIGHT = int(os.getenv("INFERENCE_RING_MAX_HEIGHT", "1080"))
+INFERENCE_RING_MAX_WIDTH = int(os.getenv("INFERENCE_RING_MAX_WIDTH", "1920"))
+
+
+def workers_for(model_path: str) -> int:
+    """Worker count for a model from INFERENCE_WORKERS, matched on the weights file name without extension"""
+    sizes = dict(item.split("=", 1) for item in INFERENCE_WORKERS.replace(" ", "").split(",") if "=" in item)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return max(1, int(sizes.get(stem, INFERENCE_WORKERS_DEFAULT)))
+
+
+def _worker_main(model_path: str, task: Optional[str], device: Optional[str], ring_name: str, requests, responses) -> None:
+    """Entry point of an inference worker: load the model once, then serve predict/track requests"""
+    from RabsProject.model_pool import ModelPool
+
+    ring = SharedFrameRing.attach(ring_name, untrack=False)
+    pool = ModelPool(backend="inproc")
+    try:
+        shared = pool.acquire(model_path, task=task, device=device)
+        responses.put(("ready", shared.names, None))
+    except Exception as e:
+        responses.put(("ready", None, repr(e)))
+        return
+
+    trackers = {}   # camera key -> ModelHandle with that camera's tracker state
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, method, seqs, camera_key, kwargs = message
+        try:
+            frames = [ring.read(seq) for seq in seqs]
+            if any(frame is None for frame in frames):
+                raise RuntimeError("frame slot was recycled before the worker read it")
+            if method == "track":
+                handle = trackers.get(camera_key)
+                if handle is None:
+                    handle = trackers[camera_key] = pool.acquire(model_path, task=task, device=device, tracking=True)
+                results = handle.track(frames[0], **kwargs)
+            else:
+                results = shared.predict(frames if len(frames) > 1 else frames[0], **kwargs)
+            responses.put((request_id, [Detections.from_result(result) for result in results], None))
+        except Exception as e:
+            responses.put((request_id, None, repr(e)))
+
+    ring.close()
+
+
+class _Worker:
+    """One inference process, its input frame ring and its request/response queues"""
+
+    def __init__(self, group: 'WorkerGroup', index: int):
+        self.group = group
+        self.index = index
+        self.name = f"{group.name}-{index}"
+        self.lock = Lock()
+        self.restarts = 0
+        self.requests_served = 0
+        self.process = None
+        self._request_ids = itertools.count(1)
+        self.ring = SharedFrameRing.create(ring_name_for(f"infer_{self.name}"), max(RING_SLOTS, INFER_MAX_BATCH),
+                                           INFERENCE_RING_MAX_HEIGHT, INFERENCE_RING_MAX_WIDTH)
+
+    def start(self) -> dict:
+        """Spawn the process and block until its model is loaded; returns the model's class names"""
+        ctx = mp.get_context("spawn")
+        self.requests = ctx.Queue()
+        self.responses = ctx.Queue()
+        group = self.group
+        self.process = ctx.Process(target=_worker_main, name=f"infer-{self.name}", daemon=True,
+                                   args=(group.model_path, group.task, group.device, self.ring.name,
+                                         self.requests, self.responses))
+        self.process.start()
+        try:
+            _, names, error = self.responses.get(timeout=INFERENCE_LOAD_TIMEOUT)
+        except queue.Empty:
+            error = f"model not loaded after {INFERENCE_LOAD_TIMEOUT}s"
+        if error is not None:
+            self._kill()
+            raise RuntimeError(f"Inference worker {self.name} failed to start: {error}")
+        logging.info(f"Inference worker {self.name}: Started as pid {self.process.pid}")
+        return names
+
+    def restart(self, reason: str) -> None:
+        logging.warning(f"Inference worker {self.name}: Restarting ({reason})")
+        self._kill()
+        self.restarts += 1
+        self.start()
+
+    def _kill(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5.0)
+
+    def call(self, method: str, frames: list, kwargs: dict, camera_key: Optional[str] = None) -> list:
+        with self.lock:
+            if not self.process.is_alive():
+                self.restart(f"exit code {self.process.exitcode}")
+
+            seqs, scales = [], []
+            for frame in frames:
+                seq = self.ring.write(frame)
+                seqs.append(seq)
+                # The ring scales frames larger than its slots down; map the boxes back afterwards
+                scales.append(frame.shape[1] / int(self.ring.slots[seq % self.ring.num_slots, 2]))
+
+            request_id = next(self._request_ids)
+            self.requests.put((request_id, method, seqs, camera_key, kwargs))
+            deadline = time.monotonic() + INFERENCE_TIMEOUT
+            while True:
+                try:
+                    response_id, detections, error = self.responses.get(timeout=0.5)
+                except queue.Empty:
+                    if not self.process.is_alive():
+                        self.restart(f"crashed with exit code {self.process.exitcode}")
+                        raise RuntimeError(f"Inference worker {self.name} crashed during a request")
+                    if time.monotonic() > deadline:
+                        self.restart(f"no response in {INFERENCE_TIMEOUT}s")
+                        raise TimeoutError(f"Inference worker {self.name} timed out")
+                    continue
+                if response_id == request_id:
+                    break
+
+            if error is not None:
+                raise RuntimeError(f"Inference worker {self.name}: {error}")
+            self.requests_served += 1
+            return [d.scaled(scale, frame.shape) for d, scale, frame in zip(detections, scales, frames)]
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=5.0)
+        self._kill()
+        self.ring.close()
+
+
+class WorkerGroup:
+    """The worker processes serving one model; predict goes to any idle worker, track sticks to one per camera"""
+    try:
+        def __init__(self, model_path: str, task: Optional[str], device: Optional[str], size: int):
+            self.model_path = model_path
+            self.task = task
+            self.device = device
+            self.key = (os.path.abspath(model_path), task, device)
+            self.name = os.path.splitext(os.path.basename(model_path))[0]
+            self.workers = [_Worker(self, index) for index in range(size)]
+            self.names = None
+            for worker in self.workers:
+                self.names = worker.start()
+            self._next = itertools.count()
+
+        def _pick(self, camera_key: Optional[str]) -> _Worker:
+            if camera_key is not None:
+                # Tracker state lives in one worker, so a camera must keep talking to the same one
+                return self.workers[hash(camera_key) % len(self.workers)]
+            for worker in self.workers:
+                if not worker.lock.locked():
+                    return worker
+            return self.workers[next(self._next) % len(self.workers)]
+
+        @property
+        def ready(self) -> bool:
+            return all(worker.process is not None and worker.process.is_alive() for worker in self.workers)
+
+        def infer(self, method: str, frames: list, kwargs: dict, camera_key: Optional[str] = None) -> list:
+            return self._pick(camera_key).call(method, frames, kwargs, camera_key)
+
+        def stats(self) -> list:
+            return [{"worker": worker.name, "pid": worker.process.pid if worker.process else None,
+                     "alive": bool(worker.process and worker.process.is_alive()),
+                     "requests": worker.requests_served, "restarts": worker.restarts} for worker in self.workers]
+
+        def stop(self) -> None:
+            for worker in self.workers:
+                worker.stop()
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+class RemoteModelHandle:
+    """ModelHandle look-alike whose inference runs in a WorkerGroup; returns ultralytics Results rebuilt from Detections"""
+
+    def __init__(self, group: WorkerGroup):
+        self.group = group
+        self.camera_key = uuid.uuid4().hex
+
+    @property
+    def batch_key(self) -> tuple:
+        return self.group.key
+
+    @property
+    def names(self):
+        return self.group.names
+
+    @property
+    def ready(self) -> bool:
+        """Whether every worker serving the model is up (workers only start once their model is loaded)"""
+        return self.group.ready
+
+    def predict(self, source, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        detections = self.group.infer("predict", frames, kwargs)
+        return [d.to_result(frame, self.group.names) for d, frame in zip(detections, frames)]
+
+    def __call__(self, source, **kwargs):
+        return self.predict(source, **kwargs)
+
+    def track(self, source, **kwargs):
+        detections = self.group.infer("track", [source], kwargs, camera_key=self.camera_key)
+        return [detections[0].to_result(source, self.group.names)]
+
+
+class InferenceService:
+    """Process-wide set of worker groups, one per (model_path, task, device), created on first use"""
+    try:
+        def __init__(self):
+            self._lock = Lock()
+            self._groups: dict[tuple, WorkerGroup] = {}
+            self._load_locks: dict[tuple, Lock] = {}
+            atexit.register(self.stop)
+
+        def acquire(self, model_path: str, task: Optional[str] = None, device: Optional[str] = None) -> RemoteModelHandle:
+            key = (os.path.abspath(model_path), task, device)
+            with self._lock:
+                group = self._groups.get(key)
+                load_lock = self._load_locks.setdefault(key, Lock())
+
+            if group is None:
+                # Spawning workers and loading the model takes seconds; only callers for this model wait for it
+                with load_lock:
+                    with self._lock:
+                        group = self._groups.get(key)
+                    if group is None:
+                        group = WorkerGroup(model_path, task, device, workers_for(model_path))
+                        with self._lock:
+                            self._groups[key] = group
+            return RemoteModelHandle(group)
+
+        def stats(self) -> dict:
+            with self._lock:
+                return {group.name: group.stats() for group in self._groups.values()}
+
+        def stop(self) -> None:
+            with self._lock:
+                groups, self._groups = list(self._groups.values()), {}
+            for group in groups:
+                group.stop()
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+inference_service = InferenceService()
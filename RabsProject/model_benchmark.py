@@ -0,0 +1,169 @@
+import os, sys
+import glob
+import time
+import cv2
+import numpy as np
+from RabsProject.exception import RabsException
+from RabsProject.detections import Detections
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_replay_set(root: str) -> list:
+    """(image path, label path) pairs from an ultralytics-layout set: root/images/*.jpg with root/labels/*.txt"""
+    images = sorted(path for path in glob.glob(os.path.join(root, "images", "*")) if path.lower().endswith(IMAGE_EXTENSIONS))
+    return [(path, os.path.join(root, "labels", os.path.splitext(os.path.basename(path))[0] + ".txt")) for path in images]
+
+
+def load_labels(label_path: str, shape: tuple, obb: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Ground truth in pixels: (boxes, classes); boxes are xyxy, or cx, cy, w, h, rotation for OBB labels.
+
+    Label lines are YOLO format, normalized: "cls cx cy w h", or "cls x1 y1 ... x4 y4" for OBB.
+    """
+    h, w = shape[:2]
+    boxes, classes = [], []
+    if os.path.exists(label_path):
+        with open(label_path) as file:
+            for line in file:
+                values = line.split()
+                if not values:
+                    continue
+                classes.append(int(values[0]))
+                coords = np.asarray(values[1:], dtype=np.float32)
+                if obb:
+                    corners = coords.reshape(4, 2) * (w, h)
+                    (cx, cy), (bw, bh), angle = cv2.minAreaRect(corners)
+                    boxes.append((cx, cy, bw, bh, np.radians(angle)))
+                else:
+                    cx, cy, bw, bh = coords * (w, h, w, h)
+                    boxes.append((cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2))
+    width = 5 if obb else 4
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, width), np.asarray(classes, dtype=int)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, M) IoU of xyxy boxes"""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def obb_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, M) polygon IoU of cx, cy, w, h, rotation boxes"""
+    iou = np.zeros((len(a), len(b)), dtype=np.float32)
+    rects_b = [((x, y), (w, h), np.degrees(r)) for x, y, w, h, r in b]
+    for i, (x, y, w, h, r) in enumerate(a):
+        rect_a = ((x, y), (w, h), np.degrees(r))
+        for j, rect_b in enumerate(rects_b):
+            _, points = cv2.rotatedRectangleIntersection(rect_a, rect_b)
+            if points is None:
+                continue
+            inter = cv2.contourArea(cv2.convexHull(points))
+            iou[i, j] = inter / (w * h + rect_b[1][0] * rect_b[1][1] - inter + 1e-9)
+    return iou
+
+
+def match_detections(pred_boxes: np.ndarray, pred_conf: np.ndarray, pred_cls: np.ndarray, gt_boxes: np.ndarray,
+                     gt_cls: np.ndarray, obb: bool, iou_threshold: float = 0.5) -> np.ndarray:
+    """True positive flag per prediction: greedy by confidence, one ground truth box per prediction"""
+    tp = np.zeros(len(pred_boxes), dtype=bool)
+    if not len(pred_boxes) or not len(gt_boxes):
+        return tp
+    iou = (obb_iou if obb else box_iou)(pred_boxes, gt_boxes)
+    iou[pred_cls[:, None] != gt_cls[None, :]] = 0
+    taken = np.zeros(len(gt_boxes), dtype=bool)
+    for i in np.argsort(-pred_conf):
+        candidates = np.where(~taken & (iou[i] >= iou_threshold))[0]
+        if len(candidates):
+            best = candidates[iou[i, candidates].argmax()]
+            taken[best] = True
+            tp[i] = True
+    return tp
+
+
+def average_precision(tp: np.ndarray, conf: np.ndarray, n_gt: int) -> float:
+    """COCO-style 101-point interpolated AP"""
+    if n_gt == 0:
+        return float("nan")
+    if not len(tp):
+        return 0.0
+    order = np.argsort(-conf)
+    tp_cum = np.cumsum(tp[order])
+    recall = tp_cum / n_gt
+    precision = tp_cum / np.arange(1, len(tp) + 1)
+    # Monotone precision envelope, then sample at 101 recall points
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    points = np.linspace(0, 1, 101)
+    index = np.searchsorted(recall, points, side="left")
+    return float(np.where(index < len(precision), precision[np.minimum(index, len(precision) - 1)], 0).mean())
+
+
+def evaluate(model, replay_set: list, obb: bool, names: dict, conf_threshold: float = 0.3,
+             warmup: int = 5, iou_threshold: float = 0.5) -> dict:
+    """Run `model` (anything with predict()) over a labelled replay set: mAP50, recall/precision at the
+    operating confidence, and per-frame latency percentiles"""
+    try:
+        stats = {}     # cls -> {"tp": [...], "conf": [...], "n_gt": n}
+        latencies = []
+        for index, (image_path, label_path) in enumerate(replay_set):
+            frame = cv2.imread(image_path)
+            if frame is None:
+                continue
+            start = time.perf_counter()
+            result = model.predict(frame, conf=0.001, verbose=False)[0]
+            if index >= warmup:
+                latencies.append(time.perf_counter() - start)
+
+            detections = Detections.from_result(result)
+            boxes = detections.data[:, :5 if obb else 4]
+            gt_boxes, gt_cls = load_labels(label_path, frame.shape, obb)
+            tp = match_detections(boxes, detections.conf, detections.cls, gt_boxes, gt_cls, obb, iou_threshold)
+            for cls in set(gt_cls.tolist()) | set(detections.cls.tolist()):
+                entry = stats.setdefault(cls, {"tp": [], "conf": [], "n_gt": 0})
+                mask = detections.cls == cls
+                entry["tp"].append(tp[mask])
+                entry["conf"].append(detections.conf[mask])
+                entry["n_gt"] += int((gt_cls == cls).sum())
+
+        per_class = {}
+        for cls, entry in sorted(stats.items()):
+            tp = np.concatenate(entry["tp"]) if entry["tp"] else np.zeros(0, dtype=bool)
+            conf = np.concatenate(entry["conf"]) if entry["conf"] else np.zeros(0)
+            operating = conf >= conf_threshold
+            per_class[names.get(cls, str(cls))] = {
+                "ap50": average_precision(tp, conf, entry["n_gt"]),
+                "recall": float(tp[operating].sum() / entry["n_gt"]) if entry["n_gt"] else float("nan"),
+                "precision": float(tp[operating].mean()) if operating.any() else float("nan"),
+                "n_gt": entry["n_gt"],
+            }
+
+        latency_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+        aps = [value["ap50"] for value in per_class.values() if not np.isnan(value["ap50"])]
+        return {
+            "map50": float(np.mean(aps)) if aps else float("nan"),
+            "classes": per_class,
+            "latency_ms": {"p50": round(float(np.percentile(latency_ms, 50)), 2),
+                           "p95": round(float(np.percentile(latency_ms, 95)), 2),
+                           "mean": round(float(latency_ms.mean()), 2)},
+            "frames": len(replay_set),
+        }
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+def compare(baseline: dict, candidate: dict) -> dict:
+    """Candidate minus baseline for mAP50, per-class recall/AP and latency"""
+    deltas = {"map50": candidate["map50"] - baseline["map50"],
+              "latency_p50_ms": candidate["latency_ms"]["p50"] - baseline["latency_ms"]["p50"],
+              "speedup": round(baseline["latency_ms"]["p50"] / max(candidate["latency_ms"]["p50"], 1e-9), 2),
+              "classes": {}}
+    for name, base in baseline["classes"].items():
+        other = candidate["classes"].get(name)
+        if other is not None:
+            deltas["classes"][name] = {"ap50": other["ap50"] - base["ap50"], "recall": other["recall"] - base["recall"]}
+    return deltas
@@ -0,0 +1,224 @@
+import os, sys
+import time
+from threading import Lock
+from typing import Optional
+import numpy as np
+from ultralytics import YOLO
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.cpu_runtimes import MODEL_RUNTIME, RuntimeModelHandle, check_runtime
+from RabsProject.inference_scheduler import INFER_MAX_BATCH
+
+
+MODEL_DEVICE = os.getenv("MODEL_DEVICE") or None   # e.g. "cpu", "0"; None lets ultralytics pick
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "inproc")   # "inproc" or "process" (worker pool, see inference_workers)
+# Batch sizes run through every model right after loading, so the slow first calls never hit a live frame
+WARMUP_BATCH_SIZES = sorted({int(size) for size in os.getenv("WARMUP_BATCH_SIZES", f"1,{INFER_MAX_BATCH}").split(",") if size.strip()})
+
+
+class TrackerState:
+    """One camera's tracker objects, kept outside the shared weights so cameras never see each other's track IDs"""
+    __slots__ = ("trackers", "vid_path")
+
+    def __init__(self):
+        self.trackers = None
+        self.vid_path = None
+
+
+class _PooledModel:
+    """A loaded model plus the lock that serializes inference on it (ultralytics predictors are not thread-safe)"""
+
+    def __init__(self, key: tuple, model=None):
+        self.key = key
+        self.model = model
+        self.lock = Lock()
+        self.handles = 0
+        self.state = "loading"      # loading -> warming -> ready, or failed
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.error = None
+
+
+def warm_up(handle, batch_sizes: list = WARMUP_BATCH_SIZES) -> None:
+    """Run dummy batches at the model's input size through the whole predict path"""
+    frame = np.zeros((handle.imgsz, handle.imgsz, 3), dtype=np.uint8)
+    for size in batch_sizes:
+        handle.predict([frame] * size if size > 1 else frame, verbose=False)
+
+
+class ModelHandle:
+    """Per-camera view of a pooled model with the same predict/__call__/track/names surface as YOLO"""
+
+    def __init__(self, pooled: _PooledModel, device: Optional[str] = None):
+        self._pooled = pooled
+        self.device = device
+        self.tracker_state = TrackerState()
+
+    @property
+    def batch_key(self) -> tuple:
+        """Handles with the same batch_key run on the same weights and can share a batch"""
+        return self._pooled.key
+
+    @property
+    def names(self):
+        return self._pooled.model.names
+
+    @property
+    def ready(self) -> bool:
+        """Whether the shared model has finished loading and warm-up"""
+        return self._pooled.state == "ready"
+
+    @property
+    def imgsz(self) -> int:
+        """Square input size the weights were trained at (ultralytics default 640)"""
+        args = getattr(self._pooled.model.model, "args", None)
+        imgsz = args.get("imgsz", 640) if isinstance(args, dict) else 640
+        return int(max(imgsz)) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+
+    def _with_device(self, kwargs: dict) -> dict:
+        if self.device is not None:
+            kwargs.setdefault("device", self.device)
+        return kwargs
+
+    def predict(self, *args, **kwargs):
+        with self._pooled.lock:
+            return self._pooled.model.predict(*args, **self._with_device(kwargs))
+
+    def __call__(self, *args, **kwargs):
+        return self.predict(*args, **kwargs)
+
+    def predict_blob(self, blob, **kwargs) -> list:
+        """Predict on an already letterboxed NCHW float blob; returns Detections in blob coordinates"""
+        import torch
+        from RabsProject.detections import Detections
+
+        results = self.predict(torch.from_numpy(blob), **kwargs)
+        return [Detections.from_result(result) for result in results]
+
+    def track(self, *args, **kwargs):
+        """model.track(persist=True) against this camera's own trackers.
+
+        ultralytics keeps trackers on the predictor and registers its tracker callbacks whenever the
+        predictor has no `trackers` attribute, so that attribute must never be removed: the callbacks
+        are registered once per model by the first call, and cameras only swap the contents of
+        predictor.trackers / predictor.vid_path in before the call and copy them back out after.
+        """
+        model = self._pooled.model
+        with self._pooled.lock:
+            predictor = model.predictor
+            if predictor is not None and hasattr(predictor, "trackers"):
+                if self.tracker_state.trackers is None:
+                    # First frame of this camera: fresh trackers built the way the registered callback would
+                    from ultralytics.trackers.track import on_predict_start
+                    on_predict_start(predictor, persist=False)
+                else:
+                    predictor.trackers[:] = self.tracker_state.trackers
+                    predictor.vid_path[:] = self.tracker_state.vid_path
+            results = model.track(*args, **self._with_device(kwargs))
+            self.tracker_state.trackers = list(model.predictor.trackers)
+            self.tracker_state.vid_path = list(model.predictor.vid_path)
+            return results
+
+
+class ModelPool:
+    """Process-wide cache of loaded models keyed by (model_path, task, device, tracking).
+
+    Every camera gets a ModelHandle onto the same weights, so memory and load time grow with the
+    number of distinct models rather than the number of cameras. Tracking models get their own
+    entry because model.track() registers tracker callbacks that would otherwise leak into predict().
+    With backend "process" the weights live in inference worker processes instead and handles are remote.
+    With runtime "onnx" or "openvino" non-tracking models run on that CPU runtime; the RuntimeModelHandle
+    is stateless and thread-safe, so every camera shares the same one.
+    """
+    try:
+        def __init__(self, backend: str = INFERENCE_BACKEND, runtime: str = MODEL_RUNTIME):
+            check_runtime(runtime)
+            self.backend = backend
+            self.runtime = runtime
+            self._lock = Lock()
+            self._models: dict[tuple, _PooledModel] = {}
+            self._loading: dict[tuple, _PooledModel] = {}
+            self._failed: dict[tuple, _PooledModel] = {}
+            self._load_locks: dict[tuple, Lock] = {}
+
+        def acquire(self, model_path: str, task: Optional[str] = None, device: Optional[str] = MODEL_DEVICE,
+                    tracking: bool = False) -> ModelHandle:
+            if self.backend == "process":
+                from RabsProject.inference_workers import inference_service
+                return inference_service.acquire(model_path, task=task, device=device)
+
+            # Tracking needs ultralytics' trackers, so it always stays on torch
+            runtime = self.runtime if self.runtime != "torch" and not tracking else None
+            key = (os.path.abspath(model_path), task, runtime or device, tracking)
+            with self._lock:
+                pooled = self._models.get(key)
+                load_lock = self._load_locks.setdefault(key, Lock())
+
+            if pooled is None:
+                # Load outside the pool lock so a slow model does not block cameras using other models
+                with load_lock:
+                    pooled = self._models.get(key)
+                    if pooled is None:
+                        pooled = self._load(key, model_path, task, device, runtime)
+
+            with self._lock:
+                pooled.handles += 1
+            return pooled.model if runtime else ModelHandle(pooled, device)
+
+        def _load(self, key: tuple, model_path: str, task: Optional[str], device: Optional[str],
+                  runtime: Optional[str]) -> _PooledModel:
+            """Load and warm up a model; it is only published to other cameras once it is ready"""
+            pooled = _PooledModel(key)
+            with self._lock:
+                self._loading[key] = pooled
+            try:
+                start = time.monotonic()
+                pooled.model = RuntimeModelHandle(model_path, runtime) if runtime else YOLO(model_path, task=task)
+                pooled.load_seconds = round(time.monotonic() - start, 2)
+
+                pooled.state = "warming"
+                start = time.monotonic()
+                warm_up(pooled.model if runtime else ModelHandle(pooled, device))
+                pooled.warmup_seconds = round(time.monotonic() - start, 2)
+                pooled.state = "ready"
+                if runtime:
+                    pooled.model.ready = True
+            except Exception as e:
+                pooled.state, pooled.error = "failed", str(e)
+                raise
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+                    if pooled.state == "ready":
+                        self._models[key] = pooled
+                        self._failed.pop(key, None)
+                    else:
+                        self._failed[key] = pooled
+
+            logging.info(f"Model pool: Loaded {model_path} (task={task}, device={runtime or device}) in "
+                         f"{pooled.load_seconds}s, warm-up {WARMUP_BATCH_SIZES} in {pooled.warmup_seconds}s")
+            return pooled
+
+        def readiness(self) -> dict:
+            """State of every model this pool has loaded or is loading, with load and warm-up times"""
+            with self._lock:
+                entries = {**self._failed, **self._loading, **self._models}
+            return {self._label(key): {"state": pooled.state, "load_seconds": pooled.load_seconds,
+                                       "warmup_seconds": pooled.warmup_seconds, "error": pooled.error}
+                    for key, pooled in entries.items()}
+
+        @staticmethod
+        def _label(key: tuple) -> str:
+            path, task, device, tracking = key
+            return f"{path} [{task or 'auto'}, {device or 'auto'}{', track' if tracking else ''}]"
+
+        def stats(self) -> dict:
+            """Loaded models and how many camera handles share each"""
+            with self._lock:
+                return {self._label(key): pooled.handles for key, pooled in self._models.items()}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+model_pool = ModelPool()
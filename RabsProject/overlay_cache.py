@@ -0,0 +1,154 @@
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Optional
+import cv2
+import numpy as np
+from RabsProject.exception import RabsException
+
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TILE_JOIN_PIXELS = 15       # static content closer than this is blended as one tile
+
+
+def opaque(color: tuple) -> tuple:
+    """BGR colour as an opaque BGRA colour, for drawing on overlay layers"""
+    return (*color, 255)
+
+
+@lru_cache(maxsize=4096)
+def _box_label(name: str, conf: float) -> str:
+    return f"{name} {conf:.2f}"
+
+
+def box_label(name: str, conf: float) -> str:
+    """'<class> <conf>' label for a detection box; confidences only show two decimals, so the strings
+    are cached per (class, rounded confidence) instead of formatted per box per frame"""
+    return _box_label(name, round(float(conf), 2))
+
+
+def _put_text(layer: np.ndarray, text: str, org: tuple, scale: float, color: tuple, thickness: int) -> None:
+    """putText onto a BGRA layer with proper `over` alpha; OpenCV's anti-aliased text overwrites
+    the alpha channel with glyph coverage instead of blending it"""
+    coverage = np.zeros(layer.shape[:2], dtype=np.uint8)
+    cv2.putText(coverage, text, org, FONT, scale, 255, thickness)
+    alpha = coverage[..., None].astype(np.uint16)
+    layer[:] = (np.array(opaque(color), dtype=np.uint16) * alpha + layer * (255 - alpha) + 127) // 255
+
+
+class _Tile:
+    """Rectangle of a BGRA layer prepared for blending: premultiplied colour and 3-channel inverse alpha"""
+    __slots__ = ("x", "y", "color", "inv_alpha")
+
+    def __init__(self, x: int, y: int, bgra: np.ndarray):
+        self.x, self.y = x, y
+        # Drawing on a transparent layer already leaves premultiplied colour
+        self.color = np.ascontiguousarray(bgra[..., :3])
+        self.inv_alpha = cv2.merge([255 - bgra[..., 3]] * 3)
+
+    def blend(self, canvas: np.ndarray, dx: int = 0, dy: int = 0) -> None:
+        """canvas = color + canvas * (1 - alpha) over the tile's rectangle shifted by (dx, dy), clipped, in place"""
+        x, y = self.x + dx, self.y + dy
+        h, w = self.inv_alpha.shape[:2]
+        x1, y1, x2, y2 = max(0, x), max(0, y), min(canvas.shape[1], x + w), min(canvas.shape[0], y + h)
+        if x1 >= x2 or y1 >= y2:
+            return
+        tile = np.s_[y1 - y:y2 - y, x1 - x:x2 - x]
+        roi = canvas[y1:y2, x1:x2]
+        cv2.multiply(roi, self.inv_alpha[tile], dst=roi, scale=1 / 255)
+        cv2.add(roi, self.color[tile], dst=roi)
+
+
+def _text_tile(text: str, scale: float, color: tuple, thickness: int, box: Optional[tuple] = None) -> _Tile:
+    """Text rendered once as a tile placed relative to putText's org, optionally on a black panel reaching
+    box=(left, top, right, bottom) pixels beyond the text"""
+    (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    # Extent around org of the glyphs (anti-aliased edges included) and of the panel
+    x0, y0, x1, y1 = -thickness, -h - thickness, w + thickness, baseline + thickness
+    if box is not None:
+        left, top, right, bottom = box
+        x0, y0, x1, y1 = min(x0, -left), min(y0, -top), max(x1, w + right), max(y1, h + bottom)
+    layer = np.zeros((y1 - y0 + 1, x1 - x0 + 1, 4), dtype=np.uint8)
+    if box is not None:
+        cv2.rectangle(layer, (-left - x0, -top - y0), (w + right - x0, h + bottom - y0), opaque((0, 0, 0)), -1)
+    _put_text(layer, text, (-x0, -y0), scale, color, thickness)
+    return _Tile(x0, y0, layer)
+
+
+class OverlayCache:
+    """Per-camera overlay layer. Static content (zones, fixed labels) is drawn once by `draw_static`
+    onto a BGRA layer and only redrawn when invalidated or the frame size changes; dynamic text items
+    are re-rendered only when their value changes (a clock once a second). Every frame then gets the
+    whole overlay in one blend pass over a few prepared tiles, with no drawing calls.
+
+    draw_static receives the BGRA layer and must draw with opaque colours, see opaque().
+    """
+    try:
+        def __init__(self, draw_static: Optional[Callable[[np.ndarray], None]] = None):
+            self.draw_static = draw_static
+            self._lock = Lock()
+            self._shape = None
+            self._static_tiles = None
+            self._texts = {}        # key -> ((text, org, scale, color, thickness, box), tile or None until rendered)
+            self._clock_second = {}
+            self.rebuilds = 0
+
+        def invalidate(self) -> None:
+            """Static content changed (e.g. a zone was edited); redrawn on the next composite"""
+            with self._lock:
+                self._static_tiles = None
+
+        def set_text(self, key: str, text: Optional[str], org: tuple, scale: float = 0.5,
+                     color: tuple = (255, 255, 255), thickness: int = 2, box: Optional[tuple] = None) -> None:
+            """Show `text` at org until it changes; None removes it. box=(left, top, right, bottom) margins
+            around the text fill a black background panel"""
+            item = None if text is None else (text, (int(org[0]), int(org[1])), scale, color, thickness, box)
+            with self._lock:
+                current = self._texts.get(key)
+                if item is None:
+                    self._texts.pop(key, None)
+                elif current is None or current[0] != item:
+                    self._texts[key] = (item, None)
+
+        def set_clock(self, key: str, org: tuple, fmt: str = '%Y-%m-%d %H:%M:%S', **style) -> None:
+            """Wall-clock text item, formatted and re-rendered once a second rather than every frame"""
+            second = int(time.time())
+            if self._clock_second.get(key) != second:
+                self._clock_second[key] = second
+                self.set_text(key, datetime.fromtimestamp(second).strftime(fmt), org, **style)
+
+        def _build_static(self, shape: tuple) -> list:
+            """Draw the static layer once and cut it into disjoint tiles around what was drawn"""
+            self.rebuilds += 1
+            if self.draw_static is None:
+                return []
+            layer = np.zeros((shape[0], shape[1], 4), dtype=np.uint8)
+            self.draw_static(layer)
+            kernel = np.ones((TILE_JOIN_PIXELS, TILE_JOIN_PIXELS), np.uint8)
+            joined = cv2.dilate((layer[..., 3] > 0).astype(np.uint8), kernel)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(joined)
+            return [_Tile(x, y, layer[y:y + h, x:x + w]) for x, y, w, h, _ in stats[1:count]]
+
+        def composite(self, frame: np.ndarray) -> np.ndarray:
+            """Blend the overlay onto `frame` in place and return it"""
+            with self._lock:
+                if self._static_tiles is None or self._shape != frame.shape[:2]:
+                    self._shape = frame.shape[:2]
+                    self._static_tiles = self._build_static(frame.shape)
+                tiles = [(tile, 0, 0) for tile in self._static_tiles]
+                for key, (item, tile) in self._texts.items():
+                    text, org, scale, color, thickness, box = item
+                    if tile is None:
+                        tile = _text_tile(text, scale, color, thickness, box)
+                        self._texts[key] = (item, tile)
+                    tiles.append((tile, org[0], org[1]))
+
+            # Static tiles are disjoint; text items are blended over them in order
+            for tile, dx, dy in tiles:
+                tile.blend(frame, dx, dy)
+            return frame
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+
+
+def letterbox(frame: np.ndarray, imgsz: int, color: tuple = (114, 114, 114)) -> tuple[np.ndarray, float, tuple]:
+    """Resize keeping aspect ratio and pad to imgsz x imgsz the way ultralytics does.
+
+    Returns (image, ratio, (pad_x, pad_y)); a point in the image maps back with (p - pad) / ratio.
+    """
+    h, w = frame.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, ratio, (left, top)
+
+
+def to_blob(image: np.ndarray) -> np.ndarray:
+    """BGR HWC uint8 -> RGB NCHW float32 in [0, 1]"""
+    return np.ascontiguousarray(image[None, :, :, ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+
+class PreprocessCache:
+    """Letterboxed blobs of one frame, computed once per input size and shared by every model that needs it"""
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+        self._blobs = {}
+
+    def get(self, imgsz: int) -> tuple[np.ndarray, float, tuple]:
+        """(blob, ratio, pad) for a square model input of side imgsz"""
+        cached = self._blobs.get(imgsz)
+        if cached is None:
+            image, ratio, pad = letterbox(self.frame, imgsz)
+            cached = self._blobs[imgsz] = (to_blob(image), ratio, pad)
+        return cached
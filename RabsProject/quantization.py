@@ -0,0 +1,96 @@
+import os, sys
+import ast
+import glob
+import random
+from typing import Optional
+import cv2
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.preprocess import letterbox, to_blob
+
+
+SNAPSHOTS_DIR = os.getenv("SNAPSHOTS_DIR", "snapshots")
+CALIBRATION_FRAMES = int(os.getenv("CALIBRATION_FRAMES", "200"))
+QUANTIZATION_PACKAGES = ("onnx", "onnxruntime")
+
+
+def check_quantization() -> None:
+    """Fail up front, with the install hint, when the INT8 tooling is not installed"""
+    from RabsProject.cpu_runtimes import missing_packages
+    missing = missing_packages(QUANTIZATION_PACKAGES)
+    if missing:
+        raise ImportError(f"INT8 quantization needs {', '.join(missing)}: pip install -r requirements-cpu.txt")
+
+
+def int8_path(model_path: str) -> str:
+    """Where the static INT8 variant of a model lives, in the artifact cache next to the FP32 export"""
+    from RabsProject.cpu_runtimes import artifact_path
+    return artifact_path(model_path, ".int8.onnx")
+
+
+def calibration_images(category: str, snapshots_dir: str = SNAPSHOTS_DIR, limit: int = CALIBRATION_FRAMES,
+                       seed: int = 0) -> list:
+    """Snapshot paths saved for a category (snapshots/<date>/<category>/*.jpg), sampled evenly across days"""
+    paths = sorted(glob.glob(os.path.join(snapshots_dir, "*", category, "*.jpg")))
+    if len(paths) > limit:
+        paths = random.Random(seed).sample(paths, limit)
+    return paths
+
+
+class SnapshotCalibrationReader:
+    """onnxruntime CalibrationDataReader over saved snapshots, letterboxed exactly like inference"""
+
+    def __init__(self, paths: list, input_name: str, imgsz: int):
+        self.paths = paths
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iter = iter(paths)
+
+    def get_next(self) -> Optional[dict]:
+        for path in self._iter:
+            frame = cv2.imread(path)
+            if frame is None:
+                logging.warning(f"Calibration: Skipping unreadable {path}")
+                continue
+            image, _, _ = letterbox(frame, self.imgsz)
+            return {self.input_name: to_blob(image)}
+        return None
+
+    def rewind(self) -> None:
+        self._iter = iter(self.paths)
+
+
+def quantize_model(model_path: str, category: str, snapshots_dir: str = SNAPSHOTS_DIR,
+                   limit: int = CALIBRATION_FRAMES, per_channel: bool = True) -> str:
+    """Static INT8 (QDQ) quantization of a model's ONNX export, calibrated on that category's snapshots"""
+    try:
+        import onnx
+        from onnxruntime.quantization import quantize_static, QuantFormat, QuantType, CalibrationMethod
+        from RabsProject.cpu_runtimes import export_model
+
+        paths = calibration_images(category, snapshots_dir, limit)
+        if not paths:
+            raise FileNotFoundError(f"No calibration snapshots under {snapshots_dir}/*/{category}/")
+
+        fp32_path = export_model(model_path, "onnx")
+        fp32 = onnx.load(fp32_path)
+        input_name = fp32.graph.input[0].name
+        metadata = {prop.key: prop.value for prop in fp32.metadata_props}
+        imgsz = ast.literal_eval(metadata.get("imgsz", "640"))
+        imgsz = int(max(imgsz)) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+
+        output_path = int8_path(model_path)
+        logging.info(f"Quantizing {fp32_path} -> {output_path} with {len(paths)} {category} snapshots")
+        quantize_static(fp32_path, output_path, SnapshotCalibrationReader(paths, input_name, imgsz),
+                        quant_format=QuantFormat.QDQ, per_channel=per_channel,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                        calibrate_method=CalibrationMethod.MinMax)
+
+        # Keep the ultralytics metadata (names, task, imgsz) that RuntimeModelHandle reads
+        quantized = onnx.load(output_path)
+        onnx.helper.set_model_props(quantized, metadata)
+        onnx.save(quantized, output_path)
+        return output_path
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
@@ -0,0 +1,106 @@
+import os, sys
+import time
+from threading import Lock
+from RabsProject.exception import RabsException
+from RabsProject.frame_sources import ANALYSIS_FPS
+
+
+ANALYSIS_RATE_FLOOR = float(os.getenv("ANALYSIS_RATE_FLOOR", "1"))          # fps for a camera with nothing going on
+ANALYSIS_RATE_CEILING = float(os.getenv("ANALYSIS_RATE_CEILING", str(ANALYSIS_FPS or 10)))
+ANALYSIS_RATE_HALF_LIFE = float(os.getenv("ANALYSIS_RATE_HALF_LIFE", "30"))  # seconds for activity to decay by half
+ANALYSIS_RATE_MOTION_LEVEL = float(os.getenv("ANALYSIS_RATE_MOTION_LEVEL", "0.5"))  # activity raised by motion alone
+ADAPTIVE_RATE = os.getenv("ADAPTIVE_RATE", "1") == "1"
+
+
+class AdaptiveRate:
+    """Per-camera analysis budget between a floor and a ceiling fps.
+
+    A detection sets activity to 1, motion raises it to ANALYSIS_RATE_MOTION_LEVEL, and it decays
+    exponentially with the configured half-life; the budget is floor + (ceiling - floor) * activity.
+    """
+
+    def __init__(self, camera_id, category: str, floor: float = ANALYSIS_RATE_FLOOR,
+                 ceiling: float = ANALYSIS_RATE_CEILING, half_life: float = ANALYSIS_RATE_HALF_LIFE,
+                 enabled: bool = ADAPTIVE_RATE):
+        self.camera_id = camera_id
+        self.category = category
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.half_life = half_life
+        self.enabled = enabled
+        self.activity = 1.0         # start at the ceiling until the camera has shown it is quiet
+        self.last_detection = None
+        self._updated = time.monotonic()
+        self._last_tick = None
+        self._ticks = 0
+
+    def _decay(self, now: float) -> None:
+        self.activity *= 0.5 ** ((now - self._updated) / self.half_life)
+        self._updated = now
+
+    def fps(self, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        self._decay(now)
+        return self.floor + (self.ceiling - self.floor) * self.activity
+
+    def due(self, now: float = None) -> bool:
+        """True when this camera may be analysed again; counts the tick if so"""
+        if not self.enabled:
+            return True
+        now = time.monotonic() if now is None else now
+        if self._last_tick is not None and now - self._last_tick < 1.0 / self.fps(now):
+            return False
+        self._last_tick = now
+        self._ticks += 1
+        return True
+
+    def record(self, detected: bool = False, motion: bool = False, now: float = None) -> None:
+        """Feed back what the last analysed frame showed"""
+        now = time.monotonic() if now is None else now
+        self._decay(now)
+        if detected:
+            self.activity = 1.0
+            self.last_detection = time.time()
+        elif motion:
+            self.activity = max(self.activity, ANALYSIS_RATE_MOTION_LEVEL)
+
+    def snapshot(self) -> dict:
+        return {
+            "category": self.category,
+            "adaptive": self.enabled,
+            "fps_budget": round(self.fps(), 2),
+            "activity": round(self.activity, 3),
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "analysed_frames": self._ticks,
+            "last_detection": self.last_detection,
+        }
+
+
+class AnalysisRates:
+    """Registry of every camera's AdaptiveRate, for the API"""
+    try:
+        def __init__(self):
+            self._lock = Lock()
+            self._rates = {}
+
+        def register(self, camera_id, category: str) -> AdaptiveRate:
+            rate = AdaptiveRate(camera_id, category)
+            with self._lock:
+                self._rates[(str(camera_id), category)] = rate
+            return rate
+
+        def snapshot(self) -> dict:
+            """{camera_id: [budget per category]}"""
+            with self._lock:
+                rates = list(self._rates.items())
+            report = {}
+            for (camera_id, _), rate in rates:
+                report.setdefault(camera_id, []).append(rate.snapshot())
+            return report
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+analysis_rates = AnalysisRates()
@@ -0,0 +1,304 @@
+import os, sys
+import re
+import time
+import uuid
+import multiprocessing as mp
+from multiprocessing import shared_memory, resource_tracker
+from typing import Optional
+import cv2
+import numpy as np
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+from RabsProject.frame_envelope import FrameEnvelope
+from RabsProject.freeze_watchdog import FreezeWatchdog
+
+
+RING_SLOTS = int(os.getenv("SHM_RING_SLOTS", "8"))
+RING_MAX_HEIGHT = int(os.getenv("SHM_RING_MAX_HEIGHT", "1080"))
+RING_MAX_WIDTH = int(os.getenv("SHM_RING_MAX_WIDTH", "1920"))
+
+_CONTROL_FIELDS = 4   # latest_seq, num_slots, max_height, max_width
+_SLOT_FIELDS = 5      # seq (-1 while being written), height, width, channels, wall time in ns
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    """Stop this process's resource tracker from unlinking a segment it only attached to"""
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class SharedFrameRing:
+    """Fixed-layout ring of BGR frames in shared memory with one writer and any number of reader processes.
+
+    Layout: int64 control block, int64 header per slot, then one contiguous byte area per slot
+    big enough for a max_height x max_width x 3 frame. A slot's seq is set to -1 while it is being
+    written, so readers can tell a torn or recycled slot from a valid one.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner
+
+        self.control = np.ndarray((_CONTROL_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.num_slots, self.max_height, self.max_width = (int(v) for v in self.control[1:4])
+        self.slot_bytes = self.max_height * self.max_width * 3
+
+        header_offset = _CONTROL_FIELDS * 8
+        data_offset = header_offset + self.num_slots * _SLOT_FIELDS * 8
+        self.slots = np.ndarray((self.num_slots, _SLOT_FIELDS), dtype=np.int64, buffer=shm.buf, offset=header_offset)
+        self.data = np.ndarray((self.num_slots, self.slot_bytes), dtype=np.uint8, buffer=shm.buf, offset=data_offset)
+
+    @classmethod
+    def create(cls, name: str, num_slots: int = RING_SLOTS, max_height: int = RING_MAX_HEIGHT,
+               max_width: int = RING_MAX_WIDTH) -> 'SharedFrameRing':
+        """Allocate a new ring; the creating process owns it and unlinks it on close()"""
+        size = (_CONTROL_FIELDS + num_slots * _SLOT_FIELDS) * 8 + num_slots * max_height * max_width * 3
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        control = np.ndarray((_CONTROL_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        control[:] = (0, num_slots, max_height, max_width)
+        del control
+        ring = cls(shm, owner=True)
+        ring.slots[:] = 0
+        logging.info(f"Shared frame ring {name}: {num_slots} slots of {max_width}x{max_height}, {size / 1e6:.1f} MB")
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, untrack: bool = True) -> 'SharedFrameRing':
+        """Map an existing ring created by another process.
+
+        Children started through multiprocessing share the parent's resource tracker and must
+        pass untrack=False, otherwise they would drop the owner's registration.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            _untrack(shm)
+        return cls(shm, owner=False)
+
+    def write(self, frame: np.ndarray, wall_time_ns: Optional[int] = None) -> int:
+        """Copy a BGR frame into the next slot and publish it; oversized frames are scaled down to fit"""
+        h, w = frame.shape[:2]
+        seq = int(self.control[0]) + 1
+        slot = seq % self.num_slots
+        header = self.slots[slot]
+        header[0] = -1
+
+        if h > self.max_height or w > self.max_width:
+            scale = min(self.max_height / h, self.max_width / w)
+            h, w = max(1, int(h * scale)), max(1, int(w * scale))
+            view = self.data[slot, :h * w * 3].reshape(h, w, 3)
+            cv2.resize(frame, (w, h), dst=view)
+        else:
+            view = self.data[slot, :h * w * 3].reshape(h, w, 3)
+            np.copyto(view, frame)
+
+        header[1:] = (h, w, 3, wall_time_ns if wall_time_ns is not None else time.time_ns())
+        header[0] = seq
+        self.control[0] = seq
+        return seq
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self.control[0])
+
+    def is_valid(self, seq: int) -> bool:
+        """True while the slot holding `seq` has not been recycled by the writer"""
+        return seq > 0 and int(self.slots[seq % self.num_slots, 0]) == seq
+
+    def read(self, seq: int, copy: bool = False) -> Optional[np.ndarray]:
+        """Return frame `seq` as a zero-copy view (or a copy), or None if it was already overwritten"""
+        if not self.is_valid(seq):
+            return None
+        slot = seq % self.num_slots
+        h, w, c = (int(v) for v in self.slots[slot, 1:4])
+        frame = self.data[slot, :h * w * c].reshape(h, w, c)
+        if copy:
+            frame = frame.copy()
+        # A view is only as good as the slot underneath it; re-check after taking it
+        return frame if self.is_valid(seq) else None
+
+    def read_latest(self, copy: bool = False) -> tuple[int, Optional[np.ndarray]]:
+        """Return the newest (seq, frame) pair; seq 0 means nothing has been written yet"""
+        seq = self.latest_seq
+        if seq == 0:
+            return 0, None
+        return seq, self.read(seq, copy=copy)
+
+    def wall_time_ns(self, seq: int) -> Optional[int]:
+        """Capture wall time recorded for `seq`, if the slot still holds it"""
+        if not self.is_valid(seq):
+            return None
+        return int(self.slots[seq % self.num_slots, 4])
+
+    def close(self) -> None:
+        """Release the mapping; the owner also removes the segment"""
+        del self.control, self.slots, self.data
+        try:
+            self.shm.close()
+        except BufferError:
+            # A consumer still holds a zero-copy view; the mapping goes away with the last reference
+            logging.warning(f"Shared frame ring {self.name}: closed while frames were still referenced")
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _is_simulated(source: str) -> bool:
+    # Imported lazily: frame_sources pulls in the decoders, which inference workers attaching to rings never need
+    from RabsProject.frame_sources import is_simulated_source
+    return is_simulated_source(source)
+
+
+def ring_name_for(camera_id) -> str:
+    """Unique segment name for a camera (the same camera may be captured by several systems)"""
+    return f"rabs_{os.getpid()}_{re.sub(r'[^A-Za-z0-9]', '_', str(camera_id))}_{uuid.uuid4().hex[:8]}"
+
+
+def _capture_main(rtsp_url: str, camera_id, ring_name: str, stop_event) -> None:
+    """Entry point of a capture process: decode with CameraStream and publish into the ring"""
+    from RabsProject.camera_system import CameraStream
+
+    ring = SharedFrameRing.attach(ring_name, untrack=False)
+    stream = CameraStream(rtsp_url, camera_id, capture_mode="latest", frame_ring=ring).start()
+    try:
+        stop_event.wait()
+    finally:
+        stream.stop()
+        ring.close()
+
+
+class CaptureProcess:
+    """Owns a SharedFrameRing and the child process that decodes one camera into it"""
+
+    def __init__(self, rtsp_url: str, camera_id, num_slots: int = RING_SLOTS,
+                 max_height: int = RING_MAX_HEIGHT, max_width: int = RING_MAX_WIDTH):
+        self.rtsp_url = rtsp_url
+        self.camera_id = camera_id
+        self.ring = SharedFrameRing.create(ring_name_for(camera_id), num_slots, max_height, max_width)
+        # spawn, not fork: the parent is a threaded uvicorn process that may hold CUDA/ONNX state
+        ctx = mp.get_context("spawn")
+        self.stop_event = ctx.Event()
+        self.process = ctx.Process(target=_capture_main, args=(rtsp_url, camera_id, self.ring.name, self.stop_event),
+                                   name=f"capture-{camera_id}", daemon=True)
+
+    def start(self) -> 'CaptureProcess':
+        self.process.start()
+        logging.info(f"Camera {self.camera_id}: Capture process {self.process.pid} started on ring {self.ring.name}")
+        return self
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            logging.warning(f"Camera {self.camera_id}: Capture process did not exit, terminating")
+            self.process.terminate()
+        self.ring.close()
+
+
+class SharedRingStream:
+    """Consumer side of a SharedFrameRing with the same read API as CameraStream"""
+    try:
+        def __init__(self, camera_id, ring_name: Optional[str] = None, capture: Optional[CaptureProcess] = None,
+                     copy_frames: bool = False, poll_interval: float = 0.002):
+            if ring_name is None and capture is None:
+                raise ValueError("SharedRingStream needs a ring name or a CaptureProcess")
+            self.camera_id = camera_id
+            self.capture = capture
+            self.ring_name = ring_name or capture.ring.name
+            self.copy_frames = copy_frames
+            self.poll_interval = poll_interval
+            self.ring = capture.ring if capture is not None else None
+            self.stopped = False
+            self._last_read_seq = 0
+            # The capture process reconnects frozen streams itself; this side only flags frames so inference is skipped
+            self.watchdog = FreezeWatchdog(camera_id, enabled=capture is None or not _is_simulated(capture.rtsp_url))
+            self._watched_seq = 0
+            self._frozen = False
+
+        def start(self) -> 'SharedRingStream':
+            """Start the capture process (if we own one) and map the ring"""
+            if self.capture is not None and not self.capture.is_alive():
+                self.capture.start()
+            if self.ring is None:
+                self.ring = SharedFrameRing.attach(self.ring_name)
+            return self
+
+        def read(self) -> tuple[bool, Optional[np.ndarray]]:
+            """Read the newest frame if it has not been returned before"""
+            ret, envelope = self.read_envelope()
+            return ret, envelope.frame if ret else None
+
+        def read_envelope(self) -> tuple[bool, Optional[FrameEnvelope]]:
+            seq, envelope = self.read_latest_envelope()
+            if envelope is None or seq == self._last_read_seq:
+                return False, None
+            self._last_read_seq = seq
+            return True, envelope
+
+        def read_latest(self) -> tuple[int, Optional[np.ndarray]]:
+            if self.ring is None or self.stopped:
+                return 0, None
+            return self.ring.read_latest(copy=self.copy_frames)
+
+        def read_latest_envelope(self) -> tuple[int, Optional[FrameEnvelope]]:
+            """Newest frame wrapped with the capture time the writer recorded in the slot header"""
+            seq, frame = self.read_latest()
+            wall_ns = self.ring.wall_time_ns(seq) if frame is not None else None
+            if wall_ns is None:
+                return seq, None
+            wall_time = wall_ns / 1e9
+            # monotonic clocks are per-boot, not per-process, but rebuild from wall time to stay portable
+            capture_ts = time.monotonic() - max(0.0, time.time() - wall_time)
+            envelope = FrameEnvelope(self.camera_id, seq, frame, capture_ts, wall_time)
+            if seq != self._watched_seq:
+                self._watched_seq = seq
+                self._frozen = self.watchdog.observe(frame)
+            envelope.frozen = self._frozen
+            return seq, envelope
+
+        def wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> tuple[int, Optional[np.ndarray]]:
+            """Poll the ring until a frame newer than `seq` is published (no cross-process event to block on)"""
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.stopped and self.ring is not None:
+                latest_seq = self.ring.latest_seq
+                if latest_seq > seq:
+                    frame = self.ring.read(latest_seq, copy=self.copy_frames)
+                    if frame is not None:
+                        return latest_seq, frame
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                time.sleep(self.poll_interval)
+            return seq, None
+
+        def wait_for_frame(self, timeout: Optional[float] = None, after: Optional[int] = None) -> bool:
+            """Like wait_for_newer() for this reader's last seq (or `after`), without reading the frame"""
+            seq = self._last_read_seq if after is None else after
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.stopped and self.ring is not None:
+                if self.ring.latest_seq > seq:
+                    return True
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                time.sleep(self.poll_interval)
+            return False
+
+        def freeze_stats(self) -> dict:
+            return self.watchdog.stats()
+
+        def stop(self) -> None:
+            self.stopped = True
+            if self.capture is not None:
+                self.capture.stop()
+            elif self.ring is not None:
+                self.ring.close()
+            self.ring = None
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
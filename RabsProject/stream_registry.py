@@ -0,0 +1,182 @@
+import os, sys
+from threading import Lock
+from typing import Callable, Optional
+from urllib.parse import urlsplit, urlunsplit
+import numpy as np
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+
+
+DEFAULT_PORTS = {"rtsp": 554, "rtsps": 322, "rtmp": 1935, "http": 80, "https": 443}
+
+
+def normalize_rtsp_url(url: str) -> str:
+    """Canonical form of a camera URL so the same camera registered twice maps to one key"""
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        # Local video files and device indices
+        return os.path.normpath(url) if os.path.sep in url else url
+    if parts.scheme.lower() not in DEFAULT_PORTS:
+        # replay:// and other pseudo-URLs carry case-sensitive file paths
+        return url
+
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit((scheme, netloc, parts.path.rstrip("/"), parts.query, ""))
+
+
+def redact_url(url: str) -> str:
+    """URL with any password masked, for log lines"""
+    parts = urlsplit(url)
+    if parts.password is None:
+        return url
+    return url.replace(f":{parts.password}@", ":***@", 1)
+
+
+class _RegistryEntry:
+    """One shared decoder and the number of subscriptions holding it"""
+
+    def __init__(self, key: str, stream):
+        self.key = key
+        self.stream = stream
+        self.refcount = 0
+        self.started = False
+        self.lock = Lock()
+
+    def start(self) -> None:
+        with self.lock:
+            if not self.started:
+                self.stream.start()
+                self.started = True
+
+
+class StreamSubscription:
+    """A consumer's handle on a shared decoder; read() tracks its own position so subscribers don't steal frames"""
+
+    def __init__(self, registry: 'StreamRegistry', entry: _RegistryEntry, camera_id):
+        self.registry = registry
+        self.entry = entry
+        self.camera_id = camera_id
+        self.released = False
+        self._last_read_seq = 0
+
+    @property
+    def stream(self):
+        return self.entry.stream
+
+    @property
+    def stopped(self) -> bool:
+        return self.released or self.entry.stream.stopped
+
+    def start(self) -> 'StreamSubscription':
+        """Start the shared decoder if no other subscriber has yet"""
+        self.entry.start()
+        return self
+
+    def read(self) -> tuple[bool, Optional[np.ndarray]]:
+        """Read the newest frame if this subscriber has not seen it yet"""
+        ret, envelope = self.read_envelope()
+        return ret, envelope.frame if ret else None
+
+    def read_envelope(self):
+        """Like read(), but returns the FrameEnvelope with capture seq and timestamps; each subscriber
+        gets its own copy of the envelope to stamp"""
+        if self.released:
+            return False, None
+        seq, envelope = self.entry.stream.read_latest_envelope()
+        if envelope is None or seq == self._last_read_seq:
+            return False, None
+        self._last_read_seq = seq
+        return True, envelope.fork()
+
+    def read_latest(self) -> tuple[int, Optional[np.ndarray]]:
+        if self.released:
+            return 0, None
+        return self.entry.stream.read_latest()
+
+    def wait_for_newer(self, seq: int, timeout: Optional[float] = None) -> tuple[int, Optional[np.ndarray]]:
+        if self.released:
+            return seq, None
+        return self.entry.stream.wait_for_newer(seq, timeout)
+
+    def wait_for_frame(self, timeout: Optional[float] = None) -> bool:
+        """Block until read_envelope() has a frame this subscriber hasn't seen; False on timeout or release"""
+        if self.released:
+            return False
+        return self.entry.stream.wait_for_frame(timeout, after=self._last_read_seq)
+
+    def stop(self) -> None:
+        """Drop this subscription; the decoder stops when the last one is gone"""
+        if not self.released:
+            self.released = True
+            self.registry.release(self.entry)
+
+
+class StreamRegistry:
+    """Process-wide map of normalized camera URL -> refcounted shared decoder"""
+    try:
+        def __init__(self, factory: Callable):
+            self._factory = factory
+            self._lock = Lock()
+            self._entries: dict[str, _RegistryEntry] = {}
+            self._open_locks: dict[str, Lock] = {}
+
+        def acquire(self, rtsp_url: str, camera_id) -> StreamSubscription:
+            """Subscribe to the decoder for `rtsp_url`, creating it on first use"""
+            key = normalize_rtsp_url(rtsp_url)
+            with self._lock:
+                open_lock = self._open_locks.setdefault(key, Lock())
+
+            # Opening a decoder can block for seconds; only callers for the same camera wait for it
+            with open_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None and not entry.stream.stopped:
+                        entry.refcount += 1
+                        logging.info(f"Camera {camera_id}: Reusing shared decoder for {redact_url(key)}")
+                        return StreamSubscription(self, entry, camera_id)
+
+                entry = _RegistryEntry(key, self._factory(rtsp_url, camera_id))
+                with self._lock:
+                    self._entries[key] = entry
+                    entry.refcount += 1
+                logging.info(f"Camera {camera_id}: Opened shared decoder for {redact_url(key)}")
+            return StreamSubscription(self, entry, camera_id)
+
+        def release(self, entry: _RegistryEntry) -> None:
+            with self._lock:
+                entry.refcount -= 1
+                if entry.refcount > 0:
+                    return
+                if self._entries.get(entry.key) is entry:
+                    del self._entries[entry.key]
+
+            # Stopping joins the capture thread, so do it outside the registry lock
+            entry.stream.stop()
+            logging.info(f"Shared decoder for {redact_url(entry.key)} stopped, no subscribers left")
+
+        def decode_stats(self) -> dict:
+            """Per-camera decode counters for every shared decoder that reports them"""
+            with self._lock:
+                streams = [entry.stream for entry in self._entries.values()]
+            return {str(stream.camera_id): stream.decode_stats() for stream in streams if hasattr(stream, "decode_stats")}
+
+        def freeze_stats(self) -> dict:
+            """Per-camera frozen state and total frozen time from each shared decoder's watchdog"""
+            with self._lock:
+                streams = [entry.stream for entry in self._entries.values()]
+            return {str(stream.camera_id): stream.freeze_stats() for stream in streams if hasattr(stream, "freeze_stats")}
+
+        def subscriber_counts(self) -> dict[str, int]:
+            with self._lock:
+                return {key: entry.refcount for key, entry in self._entries.items()}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
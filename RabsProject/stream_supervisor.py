@@ -0,0 +1,175 @@
+import os, sys
+import time
+import random
+import threading
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor
+from RabsProject.logger import logging
+from RabsProject.exception import RabsException
+
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+OFFLINE = "offline"
+
+RECONNECT_BASE_DELAY = float(os.getenv("RECONNECT_BASE_DELAY", "1"))
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "60"))
+RECONNECT_JITTER = float(os.getenv("RECONNECT_JITTER", "0.5"))
+RECONNECT_OFFLINE_AFTER = int(os.getenv("RECONNECT_OFFLINE_AFTER", "5"))
+RECONNECT_MAX_CONCURRENT = int(os.getenv("RECONNECT_MAX_CONCURRENT", "4"))
+
+
+class StreamHealth:
+    """Circuit-breaker state for one stream: healthy (closed), degraded (half-open), offline (open)"""
+    __slots__ = ("camera_id", "state", "failures", "pending", "reconnecting", "awaiting_frame",
+                 "next_attempt", "since")
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.state = HEALTHY
+        self.failures = 0
+        self.pending = False          # a reconnect is scheduled
+        self.reconnecting = False     # a reconnect is running on a worker
+        self.awaiting_frame = False   # reconnected, but no frame has arrived yet
+        self.next_attempt = 0.0
+        self.since = time.monotonic()
+
+    def set_state(self, state: str) -> None:
+        if state != self.state:
+            logging.info(f"Camera {self.camera_id}: {self.state} -> {state}")
+            self.state = state
+            self.since = time.monotonic()
+
+
+class ReconnectSupervisor:
+    """Owns reconnect policy for every stream: jittered exponential backoff on a small worker pool.
+
+    Capture threads only report what they see (report_stalled / report_frame); the actual reconnect
+    runs on a supervisor worker, so a dead camera never holds a lock or a thread another camera needs,
+    and the jitter plus the worker limit spread out the storm when a whole NVR drops at once.
+    Streams must provide a `camera_id` attribute and a `reconnect() -> bool` method.
+    """
+    try:
+        def __init__(self, base_delay: float = RECONNECT_BASE_DELAY, max_delay: float = RECONNECT_MAX_DELAY,
+                     jitter: float = RECONNECT_JITTER, offline_after: int = RECONNECT_OFFLINE_AFTER,
+                     max_concurrent: int = RECONNECT_MAX_CONCURRENT):
+            self.base_delay = base_delay
+            self.max_delay = max_delay
+            self.jitter = jitter
+            self.offline_after = offline_after
+            self.max_concurrent = max_concurrent
+            self._lock = Lock()
+            self._wakeup = threading.Event()
+            self._streams = {}  # id(stream) -> (stream, StreamHealth)
+            self._executor = None
+            self._thread = None
+
+        def register(self, stream) -> None:
+            with self._lock:
+                self._streams[id(stream)] = (stream, StreamHealth(stream.camera_id))
+
+        def unregister(self, stream) -> None:
+            with self._lock:
+                self._streams.pop(id(stream), None)
+
+        def report_frame(self, stream) -> None:
+            """Called for every delivered frame; only takes the lock when the stream was not healthy"""
+            entry = self._streams.get(id(stream))
+            if entry is None or (entry[1].state == HEALTHY and not entry[1].awaiting_frame):
+                return
+            with self._lock:
+                health = entry[1]
+                health.failures = 0
+                health.awaiting_frame = False
+                health.set_state(HEALTHY)
+
+        def report_stalled(self, stream) -> None:
+            """Called by a capture thread that stopped getting frames; schedules a reconnect"""
+            with self._lock:
+                entry = self._streams.get(id(stream))
+                if entry is None:
+                    return
+                health = entry[1]
+                if health.pending or health.reconnecting:
+                    return
+                if health.awaiting_frame:
+                    # The last reconnect opened the source but no frame ever came through
+                    health.awaiting_frame = False
+                    health.failures += 1
+                health.pending = True
+                health.next_attempt = time.monotonic() + self._backoff(health.failures)
+                health.set_state(OFFLINE if health.failures >= self.offline_after else DEGRADED)
+            self._ensure_running()
+            self._wakeup.set()
+
+        def health(self) -> dict:
+            """Per-camera state for dashboards and the API"""
+            now = time.monotonic()
+            with self._lock:
+                return {
+                    str(health.camera_id): {
+                        "state": health.state,
+                        "consecutive_failures": health.failures,
+                        "seconds_in_state": round(now - health.since, 1),
+                        "next_retry_in": round(max(0.0, health.next_attempt - now), 1) if health.pending else None,
+                    } for _, health in self._streams.values()
+                }
+
+        def _backoff(self, failures: int) -> float:
+            delay = min(self.max_delay, self.base_delay * (2 ** failures))
+            return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+        def _ensure_running(self) -> None:
+            with self._lock:
+                if self._thread is not None and self._thread.is_alive():
+                    return
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                                        thread_name_prefix="reconnect")
+                self._thread = Thread(target=self._run, name="reconnect-supervisor", daemon=True)
+                self._thread.start()
+
+        def _run(self) -> None:
+            while True:
+                now = time.monotonic()
+                due, next_wake = [], None
+                with self._lock:
+                    for stream, health in self._streams.values():
+                        if not health.pending or health.reconnecting:
+                            continue
+                        if health.next_attempt <= now:
+                            health.reconnecting = True
+                            due.append((stream, health))
+                        elif next_wake is None or health.next_attempt < next_wake:
+                            next_wake = health.next_attempt
+
+                for stream, health in due:
+                    self._executor.submit(self._attempt, stream, health)
+
+                self._wakeup.wait(timeout=1.0 if next_wake is None else max(0.01, next_wake - now))
+                self._wakeup.clear()
+
+        def _attempt(self, stream, health: StreamHealth) -> None:
+            ok = False
+            try:
+                ok = bool(stream.reconnect())
+            except Exception as e:
+                logging.error(f"Camera {health.camera_id}: Reconnect failed: {str(e)}")
+
+            with self._lock:
+                health.reconnecting = False
+                if ok:
+                    health.pending = False
+                    health.awaiting_frame = True
+                    logging.info(f"Camera {health.camera_id}: Reconnected, waiting for frames")
+                else:
+                    health.failures += 1
+                    health.next_attempt = time.monotonic() + self._backoff(health.failures)
+                    health.set_state(OFFLINE if health.failures >= self.offline_after else DEGRADED)
+            self._wakeup.set()
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+reconnect_supervisor = ReconnectSupervisor()
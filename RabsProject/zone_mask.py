@@ -0,0 +1,57 @@
+import sys
+from typing import Optional
+import cv2
+import numpy as np
+from RabsProject.exception import RabsException
+
+
+class ZoneMask:
+    """Zone polygons rasterized once into a per-pixel bitmap, so "which zones contain these points"
+    is one fancy-index lookup for all objects instead of a pointPolygonTest per object and zone.
+
+    Bit i of a pixel is set when it lies inside zone i (boundary included, as pointPolygonTest >= 0),
+    so zones may overlap; up to 32 zones per camera. The bitmap is rebuilt only when the zones or the
+    frame size change.
+    """
+    try:
+        def __init__(self, polygons: list):
+            self.mask: Optional[np.ndarray] = None
+            self.set_zones(polygons)
+
+        def set_zones(self, polygons: list) -> None:
+            """Replace the zones; the bitmap is rebuilt lazily on the next lookup"""
+            if len(polygons) > 32:
+                raise ValueError(f"ZoneMask supports at most 32 zones, got {len(polygons)}")
+            self.polygons = [np.asarray(polygon, np.int32).reshape(-1, 1, 2) for polygon in polygons]
+            self.mask = None
+
+        def _build(self, shape: tuple) -> np.ndarray:
+            count = len(self.polygons)
+            dtype = np.uint8 if count <= 8 else np.uint16 if count <= 16 else np.uint32
+            mask = np.zeros(shape[:2], dtype=dtype)
+            layer = np.zeros(shape[:2], dtype=np.uint8)
+            for bit, polygon in enumerate(self.polygons):
+                layer[:] = 0
+                cv2.fillPoly(layer, [polygon], 1)
+                cv2.polylines(layer, [polygon], True, 1)  # fillPoly can miss edge pixels on steep sides
+                mask |= layer.astype(dtype) << bit
+            return mask
+
+        def lookup(self, points: np.ndarray, shape: tuple) -> np.ndarray:
+            """Zone bits under each (x, y) point of an (N, 2) array; points outside the frame get 0"""
+            if self.mask is None or self.mask.shape != tuple(shape[:2]):
+                self.mask = self._build(shape)
+            points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+            h, w = self.mask.shape
+            x, y = points[:, 0], points[:, 1]
+            valid = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+            bits = np.zeros(len(points), dtype=self.mask.dtype)
+            bits[valid] = self.mask[y[valid], x[valid]]
+            return bits
+
+        def contains(self, points: np.ndarray, shape: tuple, zone: int = 0) -> np.ndarray:
+            """Boolean array: whether each point lies inside `zone`"""
+            return (self.lookup(points, shape) >> zone & 1).astype(bool)
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
@@ -0,0 +1,115 @@
+"""Synthetic N-camera load test for the category pipelines.
+
+Feeds N procedurally generated cameras through the same _initialize_cameras path MongoDB cameras
+use and drives the MJPEG generator for a fixed time while the system's analysis loop runs, so the
+numbers include capture, inference, drawing, grid building and JPEG encoding.
+
+Camera fps counts only frames that went through the model. Frames the motion gate or the adaptive
+rate controller let through without inference are reported separately, together with whether those
+were on (MOTION_GATE, ADAPTIVE_RATE); set both to 0 to measure raw model capacity.
+
+    python load_test.py --category fire --model models/fire.pt --cameras 4 8 16 32 --duration 60
+"""
+import argparse
+import time
+from collections import Counter
+from RabsProject.camera_system import MultiCameraSystemFire, MultiCameraSystemSmoke, MultiCameraSystemSafty, MultiCameraSystemTruck
+from RabsProject.frame_sources import synthetic_camera_data
+from RabsProject.frame_envelope import latency_tracker
+from RabsProject.motion_gate import MOTION_GATE
+from RabsProject.rate_controller import ADAPTIVE_RATE
+
+
+SYSTEMS = {
+    "fire": MultiCameraSystemFire,
+    "smoke": MultiCameraSystemSmoke,
+    "ppe": MultiCameraSystemSafty,
+    "truck": MultiCameraSystemTruck,
+}
+
+
+def count_processed(system, analysed: Counter, inferred: Counter) -> None:
+    """Wrap each processor's analyse to count the frames every camera was handed and, from the envelope's
+    "inferred" stamp, the ones that really went through the model"""
+    for camera_id, processor in system.camera_processors.items():
+        analyse = processor.analyse
+
+        def counted(frame, *args, _camera_id=camera_id, _analyse=analyse, **kwargs):
+            result = _analyse(frame, *args, **kwargs)
+            analysed[_camera_id] += 1
+            envelope = kwargs.get("envelope")
+            if envelope is not None and any(stage.startswith("inferred") for stage, _ in envelope.stamps):
+                inferred[_camera_id] += 1
+            return result
+
+        processor.analyse = counted
+
+
+def run(category: str, model: str, cameras: int, duration: float, scene: str, fps: float,
+        width: int, height: int, target_fps: float) -> dict:
+    latency_tracker.reset()
+    camera_data = synthetic_camera_data(cameras, scene=scene, width=width, height=height, fps=fps,
+                                        prefix=f"load_{category}_{cameras}")
+    system = SYSTEMS[category](email="loadtest@localhost", model_path=model, category=category, camera_data=camera_data)
+    analysed_counts, inferred_counts = Counter(), Counter()
+    count_processed(system, analysed_counts, inferred_counts)
+
+    frames = system.get_video_frames()
+    grids = 0
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < duration:
+            next(frames)
+            grids += 1
+    finally:
+        elapsed = time.monotonic() - start
+        frames.close()
+        system.stop()
+
+    latency = latency_tracker.snapshot()
+    per_camera_fps = [inferred_counts[camera_id] / elapsed for camera_id in system.camera_processors]
+    dropped = sum(sum(stats.get("frames_dropped", {}).values()) for stats in latency.values())
+    analysed = sum(analysed_counts.values())
+    inferred = sum(inferred_counts.values())
+    p95 = [stats["capture_to_screen"]["p95_ms"] for stats in latency.values() if "capture_to_screen" in stats]
+
+    return {
+        "cameras": cameras,
+        "grid_fps": round(grids / elapsed, 2),
+        "min_camera_fps": round(min(per_camera_fps, default=0.0), 2),
+        "mean_camera_fps": round(sum(per_camera_fps) / max(1, len(per_camera_fps)), 2),
+        "drop_ratio": round(dropped / max(1, dropped + analysed), 3),
+        "gated_ratio": round(1 - inferred / max(1, analysed), 3),
+        "motion_gate": MOTION_GATE,
+        "adaptive_rate": ADAPTIVE_RATE,
+        "worst_p95_capture_to_screen_ms": max(p95, default=None),
+        "sustained": min(per_camera_fps, default=0.0) >= target_fps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--category", choices=sorted(SYSTEMS), default="fire")
+    parser.add_argument("--model", required=True, help="Path to the category's YOLO weights")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per camera count")
+    parser.add_argument("--scene", choices=["moving", "fire", "static"], default="moving",
+                        help="static never changes; the freeze watchdog is off for synthetic cameras, so it is still "
+                             "analysed (subject to motion gating)")
+    parser.add_argument("--fps", type=float, default=25.0, help="Synthetic camera frame rate")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--target-fps", type=float, default=5.0, help="Per-camera analysis rate that counts as sustained")
+    args = parser.parse_args()
+
+    for cameras in args.cameras:
+        result = run(args.category, args.model, cameras, args.duration, args.scene, args.fps,
+                     args.width, args.height, args.target_fps)
+        print(result, flush=True)
+        if not result["sustained"]:
+            print(f"{args.category}: node stops sustaining {args.target_fps} fps per camera at {cameras} cameras")
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Static INT8 quantization of the category models and an FP32-vs-INT8 accuracy/latency benchmark.
+
+    python quantize_benchmark.py quantize --model models/fire.pt --category fire
+    python quantize_benchmark.py benchmark --model models/fire.pt --replay-set datasets/fire_replay --watch-class fire
+
+The replay set uses the ultralytics layout (images/ and labels/ with YOLO txt labels, OBB corners for
+fire/smoke). Once INT8 holds recall, enable it with MODEL_RUNTIME=onnx and INT8_MODELS=fire,...
+"""
+import argparse
+import json
+from RabsProject.quantization import quantize_model, check_quantization, SNAPSHOTS_DIR, CALIBRATION_FRAMES
+from RabsProject.model_benchmark import load_replay_set, evaluate, compare
+from RabsProject.cpu_runtimes import RuntimeModelHandle
+
+
+def benchmark(args) -> dict:
+    replay_set = load_replay_set(args.replay_set)
+    if not replay_set:
+        raise SystemExit(f"No images under {args.replay_set}/images")
+
+    fp32 = RuntimeModelHandle(args.model, runtime="onnx", threads=args.threads, precision="fp32")
+    int8 = RuntimeModelHandle(args.model, runtime="onnx", threads=args.threads, precision="int8")
+    obb = fp32.task == "obb"
+
+    report = {"fp32": evaluate(fp32, replay_set, obb, fp32.names, conf_threshold=args.conf),
+              "int8": evaluate(int8, replay_set, obb, int8.names, conf_threshold=args.conf)}
+    report["delta"] = compare(report["fp32"], report["int8"])
+
+    if args.watch_class:
+        drop = -report["delta"]["classes"].get(args.watch_class, {}).get("recall", float("nan"))
+        report["verdict"] = {"class": args.watch_class, "recall_drop": drop, "max_recall_drop": args.max_recall_drop,
+                             "int8_ok": bool(drop <= args.max_recall_drop)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    quantize = commands.add_parser("quantize", help="Write the INT8 ONNX model, calibrated on snapshots, into the artifact cache")
+    quantize.add_argument("--model", required=True)
+    quantize.add_argument("--category", required=True, help="Snapshot folder to calibrate on (fire, smoke, ppe, truck)")
+    quantize.add_argument("--snapshots", default=SNAPSHOTS_DIR)
+    quantize.add_argument("--frames", type=int, default=CALIBRATION_FRAMES)
+
+    bench = commands.add_parser("benchmark", help="FP32 vs INT8 mAP50, recall and latency on a labelled replay set")
+    bench.add_argument("--model", required=True)
+    bench.add_argument("--replay-set", required=True)
+    bench.add_argument("--conf", type=float, default=0.3, help="Operating confidence used for recall/precision")
+    bench.add_argument("--threads", type=int, default=None)
+    bench.add_argument("--watch-class", default=None, help="Class whose recall decides the verdict, e.g. fire")
+    bench.add_argument("--max-recall-drop", type=float, default=0.01)
+    bench.add_argument("--output", default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+    check_quantization()
+
+    if args.command == "quantize":
+        print(quantize_model(args.model, args.category, args.snapshots, args.frames))
+        return
+
+    if args.threads is None:
+        from RabsProject.cpu_runtimes import INFER_THREADS
+        args.threads = INFER_THREADS
+    report = benchmark(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
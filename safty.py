@@ -21,6 +21,12 @@ from fastapi import Query
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from RabsProject.camera_system import MultiCameraSystemSafty, SingleCameraSystemSafty, MultiCameraSystemTruck, SingleCameraSystemTruck
 from RabsProject.camera_system import MultiCameraSystemFire, SingleCameraSystemFire , MultiCameraSystemSmoke, SingleCameraSystemSmoke
+from RabsProject.camera_system import MultiCameraSystemMultiModel, camera_readiness, system_processors
+from RabsProject.stream_supervisor import reconnect_supervisor
+from RabsProject.camera_system import stream_registry
+from RabsProject.frame_envelope import latency_tracker
+from RabsProject.model_pool import model_pool
+from RabsProject.rate_controller import analysis_rates
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 from RabsProject.mon import MongoDBHandlerSaving
 from RabsProject.logger import logging
@@ -33,6 +39,7 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 HOSTING_LINK = os.getenv("HOSTING_LINK")
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "30"))  # max seconds start_streaming?wait_ready=true blocks
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 
@@ -521,6 +528,7 @@ async def start_streaming(
 
     background_tasks: BackgroundTasks,
     category: str = Query(..., description="Camera category to start streaming"),
+    wait_ready: bool = Query(False, description="Wait until every camera has delivered a first frame"),
     current_user: User = Depends(get_current_active_user)):
     try:
         global running_camera_systems
@@ -553,6 +561,16 @@ async def start_streaming(
                 email=current_user.email,
                 model_path="models/smoke.pt",
                 category=category   )
+
+        elif "+" in category:
+            # e.g. "fire+smoke": one decode and one preprocess per frame for all listed categories
+            categories = category.split("+")
+            if not set(categories) <= {"fire", "smoke", "ppe"}:
+                raise HTTPException(status_code=400, detail="Only fire, smoke and ppe can be combined")
+            camera_system = MultiCameraSystemMultiModel(
+                email=current_user.email,
+                model_paths={name: f"models/{name}.pt" for name in categories},
+                category=category   )
             
         else:
             raise HTTPException(status_code=400, detail="Invalid category")
@@ -562,6 +580,14 @@ async def start_streaming(
         running_camera_systems[unique_stream_id] = camera_system
         logger.info(f"Streaming started for {current_user.email} in category {category}")
 
+        # Models are loaded and warmed up by the constructor above; streams may still be connecting
+        cameras = camera_readiness(camera_system.camera_processors)
+        deadline = asyncio.get_running_loop().time() + READY_TIMEOUT
+        while wait_ready and not all(camera["ready"] for camera in cameras.values()) \
+                and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.25)
+            cameras = camera_readiness(camera_system.camera_processors)
+
         # Create a special long-lived token for streaming
         streaming_token_expires = timedelta(hours=24)
         streaming_token = create_access_token(
@@ -576,7 +602,9 @@ async def start_streaming(
             "message": "Streaming started",
             "stream_url": stream_url,
             "token": streaming_token,
-            "category": category    }
+            "category": category,
+            "ready": all(camera["ready"] for camera in cameras.values()),
+            "cameras": cameras    }
 
     except Exception as e:
         raise RabsException(e, sys) from e
@@ -662,6 +690,85 @@ async def running_cameras(current_user: User = Depends(get_current_user)):
         raise RabsException(e, sys) from e
   
 
+@app.get("/camera_health")
+async def camera_health(current_user: User = Depends(get_current_user)):
+    try:
+        """Connection state of every camera stream (healthy, degraded or offline) and frozen-feed time"""
+        cameras = reconnect_supervisor.health()
+        for camera_id, freeze in stream_registry.freeze_stats().items():
+            cameras.setdefault(camera_id, {}).update(freeze)
+        return {"cameras": cameras}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+@app.get("/decode_stats")
+async def decode_stats(current_user: User = Depends(get_current_user)):
+    try:
+        """Frames seen vs. decoded per camera and the skip ratio from ANALYSIS_FPS rate control"""
+        return {"cameras": stream_registry.decode_stats()}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+@app.get("/latency")
+async def latency(current_user: User = Depends(get_current_user)):
+    try:
+        """Capture-to-alert and capture-to-screen latency percentiles and dropped frames per camera"""
+        return {"cameras": latency_tracker.snapshot()}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+@app.get("/inference_workers")
+async def inference_workers(current_user: User = Depends(get_current_user)):
+    try:
+        """Loaded models, and with INFERENCE_BACKEND=process the state of each worker process"""
+        if model_pool.backend == "process":
+            from RabsProject.inference_workers import inference_service
+            return {"backend": "process", "groups": inference_service.stats()}
+        return {"backend": model_pool.backend, "models": model_pool.stats()}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+@app.get("/analysis_rates")
+async def get_analysis_rates(current_user: User = Depends(get_current_user)):
+    try:
+        """Current adaptive analysis budget (fps) and activity level per camera and category"""
+        return {"cameras": analysis_rates.snapshot()}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
+@app.get("/readiness")
+async def readiness(current_user: User = Depends(get_current_user)):
+    try:
+        """Model load/warm-up state and, per running stream, whether each camera is ready to serve"""
+        if model_pool.backend == "process":
+            from RabsProject.inference_workers import inference_service
+            models = inference_service.stats()
+            models_ready = all(worker["alive"] for workers in models.values() for worker in workers)
+        else:
+            models = model_pool.readiness()
+            models_ready = all(model["state"] == "ready" for model in models.values())
+        streams = {key: camera_readiness(system_processors(system))
+                   for key, system in running_camera_systems.items()}
+        single_camera_streams = {key: camera_readiness(system_processors(system))
+                                 for key, system in running_single_camera_systems.items()}
+        ready = models_ready and all(camera["ready"] for walk in (streams, single_camera_streams)
+                                     for cameras in walk.values() for camera in cameras.values())
+        return {"ready": ready, "models": models, "streams": streams, "single_camera_streams": single_camera_streams}
+
+    except Exception as e:
+        raise RabsException(e, sys) from e
+
+
 @app.post("/stop_streaming")
 async def stop_streaming(category: str, current_user: User = Depends(get_current_user)):
     try:
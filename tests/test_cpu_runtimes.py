@@ -0,0 +1,25 @@
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("ultralytics")  # RabsProject/__init__ imports the camera systems
+from RabsProject import cpu_runtimes
+from RabsProject.cpu_runtimes import check_runtime
+
+
+def test_torch_needs_no_extra_packages(monkeypatch):
+    monkeypatch.setattr(cpu_runtimes.importlib.util, "find_spec", lambda name: None)
+    check_runtime("torch")
+
+
+def test_unknown_runtime_is_rejected():
+    with pytest.raises(ValueError, match="MODEL_RUNTIME"):
+        check_runtime("tensorrt")
+
+
+@pytest.mark.parametrize("runtime", ["onnx", "openvino"])
+def test_missing_runtime_package_names_the_requirements_file(monkeypatch, runtime):
+    monkeypatch.setattr(cpu_runtimes.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ImportError, match="requirements-cpu.txt"):
+        check_runtime(runtime)
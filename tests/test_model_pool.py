@@ -0,0 +1,44 @@
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("ultralytics")
+import cv2
+from ultralytics.utils import ASSETS
+from RabsProject.model_pool import ModelPool
+
+
+TRACK_TEST_MODEL = os.getenv("TRACK_TEST_MODEL", "yolov8n.pt")
+FRAMES = 5
+
+
+def _ids(results) -> list:
+    boxes = results[0].boxes
+    return [] if boxes.id is None else sorted(int(i) for i in boxes.id.tolist())
+
+
+def test_two_cameras_share_one_tracking_model():
+    pool = ModelPool(backend="inproc", runtime="torch")
+    try:
+        cameras = [pool.acquire(TRACK_TEST_MODEL, tracking=True) for _ in range(2)]
+    except Exception as e:
+        pytest.skip(f"{TRACK_TEST_MODEL} not available: {e}")
+    frames = [cv2.imread(str(ASSETS / "bus.jpg")), cv2.imread(str(ASSETS / "zidane.jpg"))]
+    model = cameras[0]._pooled.model
+
+    ids = [[], []]
+    for _ in range(FRAMES):
+        for i, camera in enumerate(cameras):
+            ids[i].append(_ids(camera.track(frames[i], persist=True, verbose=False)))
+        # register_tracker must have run exactly once for the shared model
+        for event in ("on_predict_start", "on_predict_postprocess_end"):
+            tracker_callbacks = [cb for cb in model.callbacks[event]
+                                 if getattr(getattr(cb, "func", cb), "__module__", "") == "ultralytics.trackers.track"]
+            assert len(tracker_callbacks) == 1
+
+    for i, camera in enumerate(cameras):
+        # One tracker update per frame of this camera, not one per camera sharing the model
+        assert camera.tracker_state.trackers[0].frame_id == FRAMES
+        assert ids[i][0], "no tracks on the test image"
+        assert all(frame_ids == ids[i][0] for frame_ids in ids[i][1:])
@@ -0,0 +1,25 @@
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("ultralytics")  # RabsProject/__init__ imports the camera systems
+from RabsProject import cpu_runtimes
+from RabsProject.quantization import check_quantization
+
+
+def test_missing_quantization_packages_name_the_requirements_file(monkeypatch):
+    monkeypatch.setattr(cpu_runtimes.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ImportError, match="requirements-cpu.txt"):
+        check_quantization()
+
+
+def test_harness_import_path():
+    pytest.importorskip("onnx")
+    quantization_api = pytest.importorskip("onnxruntime.quantization")
+    check_quantization()
+    # The names quantize_model imports lazily, and the harness entry point
+    for name in ("quantize_static", "QuantFormat", "QuantType", "CalibrationMethod", "CalibrationDataReader"):
+        assert hasattr(quantization_api, name)
+    import quantize_benchmark
+    assert callable(quantize_benchmark.main)